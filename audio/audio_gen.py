@@ -1,7 +1,10 @@
 import json
 import pickle
 import re
-from typing import Any
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
 
 from pywikibot import Page
 
@@ -12,7 +15,6 @@ from global_config import char_id_mapper, get_characters
 from utils.dict_utils import merge_dict
 from utils.file_utils import cache_dir
 from utils.general_utils import get_bwiki_char_pages
-from utils.json_utils import load_json
 from utils.wiki_utils import bwiki
 
 
@@ -35,36 +37,73 @@ def merge_results(previous: VoiceJson, current: VoiceJson, discard_non_local: bo
             print(f"{path} not in current. Prev: {voice}")
         for k, v in voice.items():
             if k in {'transcription', 'title', 'translation'}:
-                result[path][k] = merge_dict(v, result[path][k])
+                current_value = result[path][k]
+                # most voices did not change since the last run, so skip the copying merge for them
+                if v == current_value or len(current_value) == 0:
+                    result[path][k] = v
+                else:
+                    result[path][k] = merge_dict(v, current_value)
     return dict((voice['id'], voice) for voice in result.values())
 
 
-def make_character_json(triggers: list[Trigger], char_id: int, discard: bool = False) -> None:
-    def voice_filter(v: Voice):
-        return v.role_id == 0 or v.role_id == char_id
+def voice_to_json(v: Voice) -> dict[str, Any]:
+    # Title is supposed to be empty if it's the same as the trigger
+    obj = {"id": v.id[0],
+           'title': dict((k, "") for k in v.title)}
+    for attribute in ["path", "file", "transcription", "translation"]:
+        obj[attribute] = getattr(v, attribute)
+    return obj
 
-    result: dict[int, dict[str, Any]] = {}
-    attributes = ["path", "file", "transcription", "translation"]
 
+def partition_voices(triggers: list[Trigger], char_ids: Iterable[int]) -> dict[int, list[Voice]]:
+    """
+    Group the voices of triggers by character in one pass. Voices with role id 0 belong to every
+    character. The order of the voices follows the triggers.
+    """
+    result: dict[int, list[Voice]] = dict((char_id, []) for char_id in char_ids)
     for t in triggers:
         for v in t.voices:
-            if not voice_filter(v):
-                continue
-            titles = v.title.copy()
-            # Title is supposed to be empty if it's the same as the trigger
-            for k, v in titles.items():
-                titles[k] = ""
-            # titles.update(t.name)
-            obj = {"id": v.id[0],
-                   'title': titles}
-            for attribute in attributes:
-                obj[attribute] = getattr(v, attribute)
-            result[obj['id']] = obj
+            if v.role_id == 0:
+                for voices in result.values():
+                    voices.append(v)
+            elif v.role_id in result:
+                result[v.role_id].append(v)
+    return result
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """
+    Atomically replace a file if its content differs from text.
+    :return: whether the file was written
+    """
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=path.suffix)
+    temp = Path(temp_name)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        temp.replace(path)
+    finally:
+        temp.unlink(missing_ok=True)
+    return True
+
+
+def make_character_json(voices: list[Voice], char_id: int, discard: bool = False) -> bool:
+    """
+    :param voices: voices of the character, see partition_voices
+    :return: whether the character's file changed
+    """
+    result: dict[int, dict[str, Any]] = {}
+    for v in voices:
+        obj = voice_to_json(v)
+        result[obj['id']] = obj
 
     char_name = char_id_mapper[char_id]
-    previous_path = get_json_path(char_name)
-    if previous_path.exists():
-        previous = load_json(previous_path)
+    path = get_json_path(char_name)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
     else:
         previous = {}
     # json files are stored with string keys instead of int keys
@@ -72,8 +111,7 @@ def make_character_json(triggers: list[Trigger], char_id: int, discard: bool = F
     result = merge_results(previous=previous,
                            current=result,
                            discard_non_local=discard)
-    with open(get_json_path(char_name), "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=4)
+    return write_if_changed(path, json.dumps(result, ensure_ascii=False, indent=4))
 
 
 def get_bwiki_audio_text() -> dict[str, str]:
@@ -136,15 +174,18 @@ def match_role_voice_with_bwiki(voices: list[Voice]):
                     v.text_jp = res
 
 
-def make_json():
+def make_json(workers: int = 8):
     voices = role_voice()
     # noinspection PyUnreachableCode
     if False:
         # Do not call this function: CC BY-NC-SA 4.0
         match_role_voice_with_bwiki(list(voices.values()))
     triggers = match_custom_triggers(list(voices.values()))
-    for char_id, char_name in char_id_mapper.items():
-        make_character_json(triggers, char_id, discard=False)
+    partitions = partition_voices(triggers, char_id_mapper.keys())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        changed = list(executor.map(lambda char_id: make_character_json(partitions[char_id], char_id, discard=False),
+                                    partitions))
+    print(f"{sum(changed)} of {len(changed)} voice files changed")
 
 
 def main():
@@ -1,3 +1,4 @@
+import os
 import pickle
 import re
 from functools import cache
@@ -5,16 +6,19 @@ from pathlib import Path
 
 from bs4 import BeautifulSoup
 
-from audio.audio_exporter import get_audio_languages, AudioLanguageVariant
-from audio.audio_utils import parse_path, make_custom_triggers, Trigger, UpgradeTrigger
+from audio.audio_exporter import get_audio_languages, AudioLanguage, AudioLanguageVariant
+from audio.audio_utils import make_custom_triggers, Trigger, UpgradeTrigger
 from audio.data.conversion_table import VoiceType
 from audio.voice import VoiceUpgrade, Voice
 from utils.asset_utils import audio_export_root, global_wem_root
+from utils.cache_utils import load_pickle_cache, save_pickle_cache
 from utils.file_utils import cache_dir
 from utils.general_utils import get_id_by_char
-from utils.json_utils import load_json, get_all_game_json, get_table, get_table_global
+from utils.json_utils import load_json, get_all_game_json, get_table, get_table_global, table_fingerprint
 from utils.lang import CHINESE, Language, languages_with_audio
-from utils.lang_utils import get_multilanguage_dict
+from utils.lang_utils import StringConverters
+
+VOICE_CATALOG_VERSION = 1
 
 
 def find_audio_file(event_file: Path,
@@ -166,22 +170,42 @@ def map_bank_name_to_files(p: Path) -> dict[str, list[Path]]:
 
 
 def get_audio_text(i18n: dict[str, dict], v) -> tuple[dict[str, str], dict[str, str], dict[str, dict[str, str]]]:
-    name_obj = v['VoiceName']
-    key = name_obj.get("Key", None)
-    title: dict[str, str] = get_multilanguage_dict(i18n, key, "",
-                                                   extra="" if key is None else name_obj["SourceString"])
+    return get_audio_texts(i18n, {0: v})[0]
 
-    content_obj = v['Content']
-    key = content_obj.get("Key", None)
-    content = get_multilanguage_dict(i18n, key, "",
-                                     extra="" if key is None else content_obj["SourceString"])
 
+def get_audio_texts(i18n: dict[str, dict], rows: dict[int, dict]) \
+        -> dict[int, tuple[dict[str, str], dict[str, str], dict[str, dict[str, str]]]]:
+    """
+    Resolve the titles, transcriptions and translations of many RoleVoice rows at once. Same results
+    as get_multilanguage_dict with an empty default, without rebuilding anything per row.
+    :return: row id to title, transcriptions and translations
+    """
+    converter = StringConverters.basic_converter
+    tables = list(i18n.items())
     language_codes_with_audio = set(l.code for l in languages_with_audio())
+    empty = converter("")
+
+    def resolve(text_obj: dict) -> dict[str, str]:
+        key = text_obj.get("Key", None)
+        if key is None:
+            return {CHINESE.code: empty}
+        result = {CHINESE.code: converter(text_obj["SourceString"])}
+        for lang, table in tables:
+            text = table.get(key, None)
+            if text is not None and "NoTextFound" not in text:
+                result[lang] = converter(text.strip())
+            else:
+                result[lang] = empty
+        return result
 
-    transcriptions = dict((k, v) for k, v in content.items() if k in language_codes_with_audio)
-    translations = {}
-    translations.update(dict((k, v) for k, v in content.items() if k not in language_codes_with_audio))
-    return title, transcriptions, {CHINESE.code: translations}
+    texts = {}
+    for k, v in rows.items():
+        title = resolve(v['VoiceName'])
+        content = resolve(v['Content'])
+        transcriptions = dict((lang, text) for lang, text in content.items() if lang in language_codes_with_audio)
+        translations = dict((lang, text) for lang, text in content.items() if lang not in language_codes_with_audio)
+        texts[k] = (title, transcriptions, {CHINESE.code: translations})
+    return texts
 
 
 def in_game_triggers_upgrade() -> list[UpgradeTrigger]:
@@ -195,18 +219,15 @@ def in_game_triggers_upgrade() -> list[UpgradeTrigger]:
     return result
 
 
-def parse_role_voice() -> dict[int, Voice]:
-    """
-    Lightweight version that does not deal with files.
-    :return:
-    """
+def build_role_voice() -> dict[int, Voice]:
     i18n = get_all_game_json('RoleVoice')
     voice_table = get_table_global("RoleVoice")
+    texts = get_audio_texts(i18n, voice_table)
 
     voices = {}
     path_to_voice: dict[str, Voice] = {}
     for k, v in voice_table.items():
-        name, transcription, translation = get_audio_text(i18n, v)
+        name, transcription, translation = texts[k]
 
         path: str = v["AkEvent"]["AssetPathName"].split(".")[-1]
         upgrade = VoiceUpgrade.REGULAR
@@ -231,31 +252,55 @@ def parse_role_voice() -> dict[int, Voice]:
     return voices
 
 
+def parse_role_voice() -> dict[int, Voice]:
+    """
+    Lightweight version that does not deal with files. The voices are cached on disk until RoleVoice
+    or the localization changes. Every call returns new Voice objects, so callers may modify them.
+    :return: voice id to voice; ids of voices with the same path share one Voice
+    """
+    key = table_fingerprint(global_tables=["RoleVoice"], version=VOICE_CATALOG_VERSION)
+    voices = load_pickle_cache("role_voice", key)
+    if voices is None:
+        voices = build_role_voice()
+        save_pickle_cache("role_voice", key, voices)
+    return voices
+
+
+def index_exported_audio(lang: AudioLanguage) -> set[str]:
+    """
+    :return: names of the files in the export directory of a language
+    """
+    try:
+        with os.scandir(lang.get_export_path()) as it:
+            return set(entry.name for entry in it)
+    except FileNotFoundError:
+        return set()
+
+
 def role_voice() -> dict[int, Voice]:
     voices = parse_role_voice()
+    languages = [lang for lang in get_audio_languages() if lang.code != AudioLanguageVariant.SFX.value.code]
+    exported = dict((lang.code, index_exported_audio(lang)) for lang in languages)
     result: dict[int, Voice] = {}
     for k, voice in voices.items():
-        path = voice.path
-        files: dict[str, str] = {}
-        failed = True
-        for lang in get_audio_languages():
-            if lang.code == AudioLanguageVariant.SFX.value.code:
-                continue
-            audio_file = f"{path}.wav"
-            audio_path = lang.get_export_path() / audio_file
-
-            if audio_path.exists():
-                failed = False
-            else:
-                audio_file = ""
-            files[lang.code] = audio_file
-        if failed:
+        audio_file = f"{voice.path}.wav"
+        files = dict((lang.code, audio_file if audio_file in exported[lang.code] else "") for lang in languages)
+        if all(f == "" for f in files.values()):
             continue
         voice.file = files
         result[k] = voice
     return result
 
 
+dont_steal_list = ["HuiXing.*066_org",
+                   "Lawine.*067_red",
+                   "Fuchsia.*066_red",
+                   "Yvette.*067_red",
+                   "Maddelena.*067_red",
+                   "Kokona.*067_red"]
+dont_steal_pattern = re.compile("|".join(f"(?:{l})" for l in dont_steal_list))
+
+
 def apply_trigger_fix(triggers: list[Trigger]) -> None:
     """
     Another attempt at fixing the issue in https://github.com/bnnm/wwiser/issues/49
@@ -264,12 +309,6 @@ def apply_trigger_fix(triggers: list[Trigger]) -> None:
     use internal names to sort them. This function detects this situation and lets the base voice steal
     the file of the derived event.
     """
-    dont_steal_list = {"HuiXing.*066_org",
-                       "Lawine.*067_red",
-                       "Fuchsia.*066_red",
-                       "Yvette.*067_red",
-                       "Maddelena.*067_red",
-                       "Kokona.*067_red"}
     for t in triggers:
         if t.id not in ["066", "067"]:
             continue
@@ -290,7 +329,7 @@ def apply_trigger_fix(triggers: list[Trigger]) -> None:
             if key not in extra_voice:
                 continue
             for derived in extra_voice[key]:
-                if any(re.search(l, derived.path) is not None for l in dont_steal_list):
+                if dont_steal_pattern.search(derived.path) is not None:
                     continue
                 for lang, file_path in derived.file.items():
                     # If the derived file is nonempty but the base file is empty, then steal it.
@@ -299,35 +338,45 @@ def apply_trigger_fix(triggers: list[Trigger]) -> None:
                         derived.file[lang] = ""
 
 
-def match_custom_triggers(voices: list[Voice]) -> list[Trigger]:
-    triggers = make_custom_triggers()
-
-    voice_found: set[tuple] = set()
-
-    for v in voices:
-        ids = tuple(v.id)
-        if ids in voice_found:
-            continue
-        voice_found.add(ids)
-        parsed_path = parse_path(v.path)
-        if parsed_path is None:
-            continue
-        if parsed_path.type == VoiceType.SYSTEM:
-            v.role_id = get_id_by_char("Kanami")
-        triggers[parsed_path.trigger_id].voices.append(v)
-
-    def get_voice_priority(path: str) -> int:
-        if "org" in path:
-            return 2
-        if "red" in path:
-            return 1
-        return 0
+def get_voice_priority(path: str) -> int:
+    if "org" in path:
+        return 2
+    if "red" in path:
+        return 1
+    return 0
 
-    for t in triggers.values():
-        t.voices.sort(key=lambda v: get_voice_priority(v.path))
 
-    result = list(triggers.values())
-    apply_trigger_fix(result)
+def match_all_custom_triggers[K](voices: dict[K, list[Voice]]) -> dict[K, list[Trigger]]:
+    """
+    Match the voices of many characters to triggers in a single pass.
+    :param voices: character (or any other key) to voices
+    :return: key to the triggers of its voices
+    """
+    triggers: dict[K, dict[str, Trigger]] = dict((k, make_custom_triggers()) for k in voices)
+    kanami_id = get_id_by_char("Kanami")
+
+    for k, voice_list in voices.items():
+        voice_found: set[tuple] = set()
+        for v in voice_list:
+            ids = tuple(v.id)
+            if ids in voice_found:
+                continue
+            voice_found.add(ids)
+            parsed_path = v.parsed_path
+            if parsed_path is None:
+                continue
+            if parsed_path.type == VoiceType.SYSTEM:
+                v.role_id = kanami_id
+            triggers[k][parsed_path.trigger_id].voices.append(v)
+
+    result: dict[K, list[Trigger]] = {}
+    for k, trigger_dict in triggers.items():
+        for t in trigger_dict.values():
+            t.voices.sort(key=lambda v: get_voice_priority(v.path))
+        result[k] = list(trigger_dict.values())
+        apply_trigger_fix(result[k])
     return result
 
 
+def match_custom_triggers(voices: list[Voice]) -> list[Trigger]:
+    return match_all_custom_triggers({0: voices})[0]
@@ -1,11 +1,12 @@
 import os
 import re
+import time
 
 from pywikibot import FilePage
 
 from audio.audio_parser import role_voice, in_game_triggers_upgrade, \
-    match_custom_triggers
-from audio.audio_utils import compute_audio_distance, load_json_voices, wav_to_ogg
+    match_custom_triggers, parse_role_voice
+from audio.audio_utils import compute_audio_distance, load_json_voices, wav_to_ogg, parse_path
 from audio.data.conversion_table import voice_conversion_table
 from global_config import internal_names
 from utils.asset_utils import audio_export_root, wav_root_cn, wav_root_jp, wav_root_en
@@ -35,7 +36,8 @@ def test_audio_similarity():
             if any(string in file_page_title for string in targets):
                 temp_file = download_dir / file_page_title
                 if not temp_file.exists():
-                    download_file(file_page.get_file_url(), temp_file)
+                    download_file(file_page.get_file_url(), temp_file,
+                                  sha1=file_page.latest_file_info.sha1, use_cache=True)
                 result = compute_audio_distance(local_path, temp_file)
                 print(f"Comparing {file_page_title}: {result}")
 
@@ -97,6 +99,23 @@ def test_audio_number_sequence():
                 os.startfile(wav_root_cn / v.file[CHINESE.code])
 
 
+def benchmark_parse_path(rounds: int = 10):
+    voices = list(parse_role_voice().values())
+    paths = [v.path for v in voices]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for path in paths:
+            parse_path(path)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"parse_path: {len(paths)} paths in {elapsed * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    triggers = match_custom_triggers(voices)
+    elapsed = time.perf_counter() - start
+    matched = sum(len(t.voices) for t in triggers)
+    print(f"match_custom_triggers: {matched} of {len(voices)} voices matched in {elapsed * 1000:.1f}ms")
+
+
 def batch_rename_audio():
     voices = role_voice()
     triggers = match_custom_triggers(list(voices.values()))
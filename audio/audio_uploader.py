@@ -48,7 +48,8 @@ def upload_audio_file(voices: list[Voice],
                     # This file is probably removed from the game, but the wiki still has a copy.
                     continue
                 if not temp_wiki_file.exists():
-                    download_file(file_page.get_file_url(), temp_wiki_file)
+                    download_file(file_page.get_file_url(), temp_wiki_file,
+                                  sha1=file_page.latest_file_info.sha1, use_cache=True)
                 if dry_run or force_replace:
                     is_same = audio_is_same(local_path, temp_wiki_file)
                     if not is_same:
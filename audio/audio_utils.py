@@ -1,6 +1,7 @@
 import re
 import subprocess
-from dataclasses import dataclass, field, fields
+from dataclasses import dataclass, field, fields, replace
+from functools import cache
 from pathlib import Path
 from typing import Any
 
@@ -131,57 +132,84 @@ class VoicePath:
     title: dict[str, str]
 
 
+# FIXME: temporary patch to prevent birthday lines (e.g. Vox_Audrey_Birthday_001) from interfering
+#  with regular lines
+excluded_path_pattern = re.compile(r"(_Date|Birthday_)\d{2,3}|_TeamGuide_")
+
+
+@cache
+def get_voice_path_table() -> dict[str, VoicePath]:
+    """
+    Digits of non-system voice paths to their trigger. If several voice types use the same digits,
+    the first one in voice_conversion_table wins.
+    """
+    table: dict[str, VoicePath] = {}
+    for voice_type, voice_dict in voice_conversion_table.items():
+        if voice_type == VoiceType.SYSTEM:
+            continue
+        for digits, title_tuple in voice_dict.items():
+            if digits not in table:
+                table[digits] = VoicePath(voice_type, get_trigger_id(voice_type, digits), name_tuple_to_dict(title_tuple))
+    return table
+
+
+@cache
+def get_system_voice_path_table() -> dict[str, VoicePath]:
+    return dict((digits, VoicePath(VoiceType.SYSTEM, get_trigger_id(VoiceType.SYSTEM, digits),
+                                   name_tuple_to_dict(title_tuple)))
+                for digits, title_tuple in voice_conversion_table[VoiceType.SYSTEM].items())
+
+
+def name_tuple_to_dict(names: tuple[str, str]) -> dict[str, str]:
+    cn, en = names
+    return {
+        CHINESE.code: cn,
+        ENGLISH.code: en,
+    }
+
+
 def parse_path(path: str) -> VoicePath | None:
-    # FIXME: temporary patch to prevent birthday lines (e.g. Vox_Audrey_Birthday_001) from interfering
-    #  with regular lines
-    if re.search(r"(_Date|Birthday_)\d{2,3}", path) is not None or "_TeamGuide_" in path:
+    """
+    Find the trigger of a voice by its path. The result is shared between voices with the same
+    trigger and must not be modified.
+    """
+    if excluded_path_pattern.search(path) is not None:
         return None
 
     digits = get_voice_path_digits(path)
     if digits is None:
         return None
 
-    def name_tuple_to_dict(names: tuple[str, str]) -> dict[str, str]:
-        cn, en = names
-        return {
-            CHINESE.code: cn,
-            ENGLISH.code: en,
-        }
-
     if "Vox_Communicate_Kanami" in path:
-        voice_type = VoiceType.SYSTEM
-        title_tuple = voice_conversion_table[VoiceType.SYSTEM][digits]
-    else:
-        for voice_type, voice_dict in voice_conversion_table.items():
-            if voice_type == VoiceType.SYSTEM:
-                continue
-            if digits in voice_dict:
-                title_tuple = voice_dict[digits]
-                break
-        else:
-            return None
-    trigger_id = get_trigger_id(voice_type, digits)
-    return VoicePath(voice_type, trigger_id, name_tuple_to_dict(title_tuple))
-
-
-def make_custom_triggers():
-    triggers: dict[str, Trigger] = {}
-
-    def make_trigger(key: str, names: dict[str, str], voice_type: VoiceType):
-        trigger_id = key
-        triggers[key] = Trigger(
-            id=trigger_id,
-            name=names,
-            description=names,
-            role_id=0,
-            type=voice_type,
-        )
+        return get_system_voice_path_table()[digits]
+    return get_voice_path_table().get(digits, None)
 
+
+@cache
+def get_trigger_skeleton() -> tuple["Trigger", ...]:
+    """
+    One trigger per entry in voice_conversion_table, without any voices. Built once per process.
+    """
+    triggers = []
     for voice_type, table in voice_conversion_table.items():
         for digits, names in table.items():
             names_dict = dict(zip(table_languages, names))
-            make_trigger(get_trigger_id(voice_type, digits), names_dict, voice_type)
-    return triggers
+            triggers.append(Trigger(
+                id=get_trigger_id(voice_type, digits),
+                name=names_dict,
+                description=names_dict,
+                role_id=0,
+                type=voice_type,
+            ))
+    return tuple(triggers)
+
+
+def make_custom_triggers() -> dict[str, "Trigger"]:
+    """
+    Fresh copies of the trigger skeleton. Names and descriptions are shared between copies and must
+    not be modified.
+    """
+    return dict((t.id, replace(t, voice_id=[], voices=[], children=[])) for t in get_trigger_skeleton())
 
 
 @dataclass
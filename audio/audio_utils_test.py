@@ -0,0 +1,79 @@
+import re
+
+import pytest
+
+from audio import audio_utils
+from audio.audio_utils import VoicePath, get_system_voice_path_table, get_trigger_id, get_voice_path_table, \
+    name_tuple_to_dict, parse_path
+from audio.data.conversion_table import VoiceType
+from audio.voice import get_voice_path_digits
+
+
+def parse_path_linear(path: str, table: dict) -> VoicePath | None:
+    """
+    parse_path as it was before the digits were indexed: scan the voice types in table order.
+    """
+    if re.search(r"(_Date|Birthday_)\d{2,3}", path) is not None or "_TeamGuide_" in path:
+        return None
+    digits = get_voice_path_digits(path)
+    if digits is None:
+        return None
+    if "Vox_Communicate_Kanami" in path:
+        voice_type = VoiceType.SYSTEM
+        title_tuple = table[VoiceType.SYSTEM][digits]
+    else:
+        for voice_type, voice_dict in table.items():
+            if voice_type == VoiceType.SYSTEM:
+                continue
+            if digits in voice_dict:
+                title_tuple = voice_dict[digits]
+                break
+        else:
+            return None
+    return VoicePath(voice_type, get_trigger_id(voice_type, digits), name_tuple_to_dict(title_tuple))
+
+
+@pytest.fixture
+def conversion_table(monkeypatch):
+    first, second = [t for t in VoiceType if t != VoiceType.SYSTEM][:2]
+    table = {
+        first: {"001": ("一", "One")},
+        # 001 is used by both types, and the first one wins
+        second: {"001": ("二", "Two"), "002": ("三", "Three")},
+        VoiceType.SYSTEM: {"001": ("系统", "System")},
+    }
+    monkeypatch.setattr(audio_utils, "voice_conversion_table", table)
+    get_voice_path_table.cache_clear()
+    get_system_voice_path_table.cache_clear()
+    yield table
+    get_voice_path_table.cache_clear()
+    get_system_voice_path_table.cache_clear()
+
+
+paths = [
+    "Vox_Michele_001",
+    "Vox_Michele_BPCHAR_002",
+    "Vox_Michele_003",
+    "Vox_Communicate_Kanami_001",
+    "Vox_Audrey_Birthday_001",
+    "Vox_Michele_Date01_001",
+    "Vox_Michele_TeamGuide_001",
+    "Vox_Michele",
+]
+
+
+@pytest.mark.parametrize("path", paths)
+def test_parse_path_matches_linear_scan(conversion_table, path: str):
+    assert parse_path(path) == parse_path_linear(path, conversion_table)
+
+
+def test_parse_path(conversion_table):
+    first, second = [t for t in VoiceType if t != VoiceType.SYSTEM][:2]
+    assert parse_path("Vox_Michele_001") == VoicePath(first, "001", {"cn": "一", "en": "One"})
+    assert parse_path("Vox_Michele_BPCHAR_002").type == second
+    assert parse_path("Vox_Michele_003") is None
+    assert parse_path("Vox_Communicate_Kanami_001") == VoicePath(VoiceType.SYSTEM, "Kanami_Communicate_001",
+                                                                 {"cn": "系统", "en": "System"})
+    assert parse_path("Vox_Audrey_Birthday_001") is None
+    assert parse_path("Vox_Michele_Date01_001") is None
+    assert parse_path("Vox_Michele_TeamGuide_001") is None
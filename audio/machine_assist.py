@@ -1,16 +1,28 @@
 import json
+import os
 import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 from time import sleep
+from typing import Any, Iterator
 
 from audio_utils import get_json_path
 from global_config import name_to_en, char_id_mapper, get_characters
 from page_generator.translations import get_translations
 from page_generator.weapons import get_weapons_by_type, WeaponType
 from utils.asset_utils import wav_root_cn, audio_export_root
+from utils.dedup_utils import hash_files
+from utils.file_utils import cache_dir
 from utils.general_utils import camp_name_cn
 from utils.json_utils import load_json
 from utils.lang import ENGLISH, CHINESE, Language, LanguageVariants
 
+transcription_cache_path = cache_dir / "transcriptions.json"
+
+
 def get_char_prompts(char_name: str) -> list[dict[str, str]]:
     char_prompts: dict[str, list[tuple[str, str, str]]] = {
         'Michele': [('喵喵卫士', 'Pawtector'), ('火力大喵', 'Mighty Meowblast')],
@@ -64,42 +76,213 @@ def postprocess_chinese(t: str) -> str:
     return t
 
 
-def load_whisper_model():
+def get_whisper_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_whisper_model(device: str | None = None):
+    """
+    :param device: "cuda" or "cpu"; defaults to CUDA if it is available
+    """
     import whisper
-    model = whisper.load_model(name="large-v3", device="cuda", download_root="models")
+    if device is None:
+        device = get_whisper_device()
+    model = whisper.load_model(name="large-v3", device=device, download_root="models")
     return model
 
 
-def transcribe_char(char_name: str, model = None, lang: Language = ENGLISH):
+@dataclass
+class TranscriptionItem:
+    char_name: str
+    lang: Language
+    voice_id: str
+    file: Path
+    prompt: str
+
+
+def collect_transcription_items(char_names: list[str], languages: list[Language],
+                                voices: dict[str, dict]) -> list[TranscriptionItem]:
+    """
+    Find voices without a transcription that have an exported audio file.
+    :param voices: character name to voice JSON; filled in by this function
+    :return: items sorted by language and prompt
+    """
+    items: list[TranscriptionItem] = []
+    exported: dict[str, set[str]] = {}
+    for lang in languages:
+        export_dir = audio_export_root / lang.audio_dir_name
+        exported[lang.code] = set(os.listdir(export_dir)) if export_dir.is_dir() else set()
+    for char_name in char_names:
+        json_path = get_json_path(char_name)
+        assert json_path.exists()
+        with open(json_path, "r", encoding="utf-8") as f:
+            voices[char_name] = json.load(f)
+        for lang in languages:
+            prompt = None
+            for voice_id, voice in voices[char_name].items():
+                existing = voice['transcription'].get(lang.code, None)
+                if existing is not None and existing != '':
+                    continue
+                file_name = voice['file'].get(lang.code, "")
+                if file_name not in exported[lang.code]:
+                    continue
+                if prompt is None:
+                    prompt = get_prompt(char_name, lang)
+                items.append(TranscriptionItem(char_name, lang, voice_id,
+                                               audio_export_root / lang.audio_dir_name / file_name, prompt))
+    items.sort(key=lambda item: (item.lang.code, item.prompt))
+    return items
+
+
+def decode_audio_files(items: list[TranscriptionItem], workers: int = 4,
+                       prefetch: int = 32) -> Iterator[tuple[TranscriptionItem, Any]]:
+    """
+    Decode and resample audio files for Whisper in background threads, keeping at most prefetch
+    files ahead of the consumer.
+    :return: items in order with their decoded audio
+    """
+    import whisper
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[TranscriptionItem, Future]] = deque()
+        remaining = iter(items)
+        for item in remaining:
+            pending.append((item, executor.submit(whisper.load_audio, str(item.file))))
+            if len(pending) >= prefetch:
+                break
+        while len(pending) > 0:
+            item, future = pending.popleft()
+            next_item = next(remaining, None)
+            if next_item is not None:
+                pending.append((next_item, executor.submit(whisper.load_audio, str(next_item.file))))
+            yield item, future.result()
+
+
+def save_voice_json(char_name: str, voices: dict) -> None:
     json_path = get_json_path(char_name)
-    assert json_path.exists()
-    voices = load_json(json_path)
-    prompt = get_prompt(char_name, lang)
-    print(f"Prompt: {prompt}")
+    temp = json_path.with_suffix(".tmp")
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(voices, f, ensure_ascii=False, indent=4)
+    temp.replace(json_path)
+
+
+class TranscriptionCache:
+    """
+    Whisper output of audio files by language and SHA-1 of their content. The same audio may ship in
+    several language folders (e.g. untranslated lines), and Whisper is told the language, so texts
+    are never shared between languages. Texts are stored before post-processing.
+    """
+    version = 2
+
+    def __init__(self, path: Path = transcription_cache_path):
+        self.path = path
+        self.by_hash: dict[str, str] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Older caches were keyed by content alone. Caches of runs that reused texts by loudness
+            # fingerprint may hold the text of another line under a hash, so they are dropped as well.
+            if data.get("version", 1) == self.version and len(data.get("fingerprint", {})) == 0:
+                self.by_hash = data["hash"]
+
+    def get(self, lang: Language, sha1: str) -> str | None:
+        return self.by_hash.get(f"{lang.code}:{sha1}", None)
+
+    def add(self, lang: Language, sha1: str, text: str) -> None:
+        self.by_hash[f"{lang.code}:{sha1}"] = text
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "hash": self.by_hash}, f, ensure_ascii=False)
+        temp.replace(self.path)
+
+
+def transcribe_voices(char_names: list[str], languages: list[Language], model=None,
+                      checkpoint_every: int = 20, loader_workers: int = 4) -> None:
+    """
+    Transcribe all voices of several characters and languages that have no transcription yet.
+    Results are written to the character JSON files every checkpoint_every files, so an interrupted
+    run continues where it stopped when started again.
+
+    Audio is only sent to Whisper once per language and content hash: identical files of other voices
+    in the same language, and files transcribed in earlier runs, reuse the text from the
+    transcription cache.
+    """
+    voices: dict[str, dict] = {}
+    items = collect_transcription_items(char_names, languages, voices)
+    hashes = hash_files(item.file for item in items)
+    cache = TranscriptionCache()
+    # items with the same language and audio; only the first one of each group is transcribed
+    groups: dict[tuple[str, str], list[TranscriptionItem]] = {}
+    for item in items:
+        groups.setdefault((item.lang.code, hashes[item.file]), []).append(item)
+
+    dirty: set[str] = set()
+
+    def fill(key: tuple[str, str], text: str):
+        for group_item in groups[key]:
+            if group_item.lang == CHINESE:
+                group_text = postprocess_chinese(text)
+            else:
+                group_text = text
+            voices[group_item.char_name][group_item.voice_id]['transcription'][group_item.lang.code] = group_text
+            dirty.add(group_item.char_name)
+            print(f"{group_item.char_name}: {group_text}")
+
+    queue: list[TranscriptionItem] = []
+    cached = 0
+    for key, group in groups.items():
+        text = cache.get(group[0].lang, key[1])
+        if text is None:
+            queue.append(group[0])
+        else:
+            fill(key, text)
+            cached += len(group)
+    print(f"{len(items)} files to transcribe: {cached} from cache, {len(queue)} distinct files for Whisper")
+    start = time.perf_counter()
+
+    def checkpoint(done: int):
+        for char_name in dirty:
+            save_voice_json(char_name, voices[char_name])
+        dirty.clear()
+        cache.save()
+        minutes = (time.perf_counter() - start) / 60
+        if done > 0:
+            print(f"{done}/{len(queue)} files, {done / minutes:.1f} files/min")
+
+    checkpoint(0)
+    if len(queue) == 0:
+        return
     if model is None:
         model = load_whisper_model()
-    for voice_id, voice in voices.items():
-        existing = voice['transcription'].get(lang.code, None)
-        if existing is not None and existing != '':
-            continue
-        file = audio_export_root / lang.audio_dir_name / voice['file'].get(lang.code, "DOES_NOT_EXIST")
-        if not file.exists() or file.is_dir():
-            continue
-        result = model.transcribe(str(file), language=lang.iso_code, patience=2, beam_size=7, prompt=prompt)
+    fp16 = model.device.type == "cuda"
+
+    previous_group = None
+    for index, (item, audio) in enumerate(decode_audio_files(queue, workers=loader_workers), 1):
+        if (item.lang.code, item.prompt) != previous_group:
+            previous_group = (item.lang.code, item.prompt)
+            print(f"Language: {item.lang.code}, prompt: {item.prompt}")
+        sha1 = hashes[item.file]
+        result = model.transcribe(audio, language=item.lang.iso_code, patience=2, beam_size=7,
+                                  prompt=item.prompt, fp16=fp16)
         text = result['text'].strip()
-        if lang == CHINESE:
-            text = postprocess_chinese(text)
-        voice['transcription'][lang.code] = text
-        print(text)
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(voices, f, ensure_ascii=False, indent=4)
+        cache.add(item.lang, sha1, text)
+        fill((item.lang.code, sha1), text)
+        if index % checkpoint_every == 0:
+            checkpoint(index)
+    checkpoint(len(queue))
+
+
+def transcribe_char(char_name: str, model = None, lang: Language = ENGLISH):
+    transcribe_voices([char_name], [lang], model)
 
 
-def transcribe():
-    model = load_whisper_model()
-    for c in get_characters():
-        if c.name:
-            transcribe_char(c.name, model)
+def transcribe(languages: list[Language] | None = None):
+    if languages is None:
+        languages = [ENGLISH]
+    transcribe_voices([c.name for c in get_characters() if c.name], languages)
 
 
 def translate():
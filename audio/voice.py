@@ -1,6 +1,7 @@
 import re
 from dataclasses import dataclass, field, fields
 from enum import Enum
+from functools import cached_property
 
 from utils.dict_utils import merge_dict2
 from utils.lang import Language
@@ -64,14 +65,26 @@ class Voice:
     def path_digits(self) -> str | None:
         return get_voice_path_digits(self.path)
 
+    @cached_property
+    def parsed_path(self):
+        """
+        Trigger of this voice, parsed from its path on first access.
+        :return: VoicePath or None
+        """
+        from audio.audio_utils import parse_path
+        return parse_path(self.path)
+
     @property
     def icon(self):
         assert self.role_id != 0
         return f"File:Item Icon 22{self.role_id}001.png"
 
 
+voice_path_digits_pattern = re.compile(r"(\d{3})(_|$)")
+
+
 def get_voice_path_digits(path: str) -> str | None:
-    r = re.search(r"(\d{3})(_|$)", path)
+    r = voice_path_digits_pattern.search(path)
     if r is None:
         return None
     return r.group(1)
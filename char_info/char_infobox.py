@@ -7,7 +7,9 @@ from pywikibot import Page
 from global_config import Character
 from utils.general_utils import get_camp, get_role_name, get_char_pages2
 from utils.json_utils import get_game_json, get_table_global
-from utils.lang import get_language
+from utils.lang import Language, get_language
+from utils.page_transform import register_page_transform, transform_pages
+from utils.wtp_utils import get_templates_by_name
 
 
 def nop(x: str | list[str]):
@@ -39,22 +41,23 @@ infobox_args: list[tuple[list[str] | str, str, Callable[[list[str] | str], str]]
 ]
 
 
-def make_infobox(char: Character, p: Page, save=True) -> dict:
-    lang = get_language()
+@register_page_transform("infobox")
+def fill_infobox(char: Character, parsed: wtp.WikiText, lang: Language, create: bool = False) -> dict:
+    """
+    :param create: fill a new infobox if the page has none; the new infobox is not added to the page
+    """
     i18n = get_game_json(lang)['RoleProfile']
     char_profile = get_table_global("RoleProfile")[char.id]
     data: dict[str, str] = {}
-    parsed = wtp.parse(p.text)
-    for template in parsed.templates:
-        if template.name.strip() == "CharacterInfobox":
-            t = template
-            break
+    templates = get_templates_by_name(parsed, "CharacterInfobox")
+    if len(templates) > 0:
+        t = templates[0]
+    elif create:
+        t = wtp.Template("{{CharacterInfobox}}")
     else:
-        if not save:
-            t = wtp.Template("{{CharacterInfobox}}")
-        else:
-            print("Infobox template not found on " + p.title())
-            return data
+        print("Infobox template not found on " + char.name)
+        return data
+
     def add_arg(name, value):
         value = str(value)
         if t.has_arg(name) and value.strip() == "":
@@ -84,7 +87,12 @@ def make_infobox(char: Character, p: Page, save=True) -> dict:
     except Exception as e:
         print("Insufficient info for " + char.name)
         print(e)
-        return data
+    return data
+
+
+def make_infobox(char: Character, p: Page, save=True) -> dict:
+    parsed = wtp.parse(p.text)
+    data = fill_infobox(char, parsed, get_language(), create=not save)
     if p.text.strip() != str(parsed).strip():
         p.text = str(parsed)
         if save:
@@ -98,8 +106,7 @@ def generate_infobox(pages: list[tuple[Character, Page]] = None):
     if pages is None:
         pages = get_char_pages2(lang=language)
         save = True
-    for char, p in pages:
-        make_infobox(char, p, save=save)
+    transform_pages(pages, "infobox", language, save=save, summary="generate infobox")
 
 
 if __name__ == "__main__":
@@ -1,19 +1,22 @@
 import json
 import subprocess
-from dataclasses import dataclass
-from functools import cache
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
 
 from pywikibot import FilePage, Page
-from pywikibot.pagegenerators import PreloadingGenerator
 
-from utils.dict_utils import merge_dict2
-from utils.file_utils import temp_file_dir, temp_download_dir
+from utils.cache_utils import locked_cache
+from utils.dict_utils import merge_dict2, merge_i18n
+from utils.file_utils import temp_file_dir
 from utils.general_utils import get_char_by_id, en_name_to_zh, download_file, split_and_save_dict, en_name_to_cn
 from utils.json_utils import get_all_game_json, get_table, get_table_global
 from utils.lang import CHINESE, ENGLISH
 from utils.lang_utils import get_multilanguage_dict
-from utils.upload_utils import upload_file, upload_item_icons
-from utils.wiki_utils import bwiki, s, save_json_page
+from utils.page_cache import page_info_cache
+from utils.upload_scheduler import UploadScheduler
+from utils.upload_utils import upload_budget, upload_file, upload_item_icons
+from utils.wiki_utils import bwiki, get_image_info, s, save_json_page
 
 
 @dataclass
@@ -55,7 +58,7 @@ class SkinInfo:
         return f"File:Item Icon {self.id}.png"
 
 
-@cache
+@locked_cache
 def parse_skin_tables() -> dict[str, list[SkinInfo]]:
     skins_table = get_table("RoleSkin")
     skins: dict[str, list[SkinInfo]] = {}
@@ -82,34 +85,86 @@ class SkinUpload:
     source: FilePage
     target: FilePage
     skin: SkinInfo
+    char_name: str
+    kind: str
+    cat: str
 
+    @property
+    def text(self) -> str:
+        return (f"Taken from [https://wiki.biligame.com/klbq/"
+                f"{self.source.title(with_ns=True, underscore=True)} bwiki], "
+                f"this image is licensed under CC BY-NC-SA 4.0."
+                f"[[Category:{self.char_name} images]]"
+                f"\n[[Category:{self.cat}]]")
+
+
+# kind of image -> bwiki title, wiki title, category
+skin_image_kinds = {
+    "front": (SkinInfo.get_bwiki_screenshot_front_title, SkinInfo.get_mh_screenshot_front_title,
+              "Skin screenshots"),
+    "back": (SkinInfo.get_bwiki_screenshot_back_title, SkinInfo.get_mh_screenshot_back_title,
+             "Skin back screenshots"),
+    "portrait": (SkinInfo.get_bwiki_portrait_title, SkinInfo.get_mh_portrait_title,
+                 "Skin portraits"),
+}
+
+
+def plan_skin_uploads(skins: dict[str, list[SkinInfo]]) -> list[SkinUpload]:
+    uploads: list[SkinUpload] = []
+    for char_name, skin_list in skins.items():
+        name_zh = en_name_to_zh[char_name]
+        for skin in skin_list:
+            for kind, (bwiki_title, title, cat) in skin_image_kinds.items():
+                uploads.append(SkinUpload(FilePage(bwiki(), bwiki_title(skin, name_zh)),
+                                          FilePage(s, title(skin, char_name)),
+                                          skin, char_name, kind, cat))
+    return uploads
+
+
+def sync_skin_images(skins: dict[str, list[SkinInfo]], workers: int = 4,
+                     summary: str = "upload file from bwiki") -> dict[str, list[SkinInfo]]:
+    """
+    Copy front, back and portrait images of skins from bwiki. All transfers of all characters are
+    planned first with batched lookups, then run concurrently. Completed transfers are recorded,
+    so an interrupted run resumes where it stopped.
+    :return: character name to skins that have a front screenshot, with back and portrait set if
+        those images exist
+    """
+    uploads = plan_skin_uploads(skins)
+    target_cache = page_info_cache(s)
+    target_cache.prefetch(u.target for u in uploads)
+    missing = [u for u in uploads if not target_cache.exists(u.target)]
+    source_infos = get_image_info((u.source.title(with_ns=True) for u in missing), bwiki())
+    transfers = [u for u in missing if u.source.title(with_ns=True) in source_infos]
+    missing_targets = set(u.target.title() for u in missing)
+    transfer_targets = set(u.target.title() for u in transfers)
+    available = set((u.kind, u.skin.id)
+                    for u in uploads
+                    if u.target.title() not in missing_targets or u.target.title() in transfer_targets)
+    # back and portrait images are only used for skins with a front screenshot
+    transfers = [u for u in transfers if ("front", u.skin.id) in available]
+
+    def transfer(u: SkinUpload):
+        upload_skin_screenshot(source_infos[u.source.title(with_ns=True)].url, u.target, u.text, summary)
+
+    scheduler = UploadScheduler(transfer, key=lambda u: u.target.title(), workers=workers,
+                                budget=upload_budget)
+    failures = scheduler.run(transfers, job="skin_images")
+    if len(failures) > 0:
+        raise RuntimeError(f"{len(failures)} of {len(transfers)} skin images failed") from failures[0][1]
+
+    result: dict[str, list[SkinInfo]] = {}
+    for char_name, skin_list in skins.items():
+        # skins come from the shared parse_skin_tables() cache, so image names go on copies
+        result[char_name] = [replace(skin,
+                                     back=skin.name_cn if ("back", skin.id) in available else skin.back,
+                                     portrait=skin.name_cn if ("portrait", skin.id) in available else skin.portrait)
+                             for skin in skin_list if ("front", skin.id) in available]
+    return result
 
-def upload_skins(char_name: str, skin_list: list[SkinInfo]) -> list[SkinInfo]:
-    original_skins = list(skin_list)
-    name_zh = en_name_to_zh[char_name]
-    skin_uploads = [SkinUpload(FilePage(bwiki(), skin.get_bwiki_screenshot_front_title(name_zh)),
-                               FilePage(s, skin.get_mh_screenshot_front_title(char_name)),
-                               skin)
-                    for skin in skin_list]
-
-    skin_list = process_skin_upload_requests(char_name, skin_uploads)
-
-    skin_uploads = [SkinUpload(FilePage(bwiki(), skin.get_bwiki_screenshot_back_title(name_zh)),
-                               FilePage(s, skin.get_mh_screenshot_back_title(char_name)),
-                               skin)
-                    for skin in skin_list]
-    for skin in process_skin_upload_requests(char_name, skin_uploads,
-                                             cat="Skin back screenshots"):
-        skin.back = skin.name_cn
-
-    skin_uploads = [SkinUpload(FilePage(bwiki(), skin.get_bwiki_portrait_title(name_zh)),
-                               FilePage(s, skin.get_mh_portrait_title(char_name)),
-                               skin)
-                    for skin in skin_list]
-    for skin in process_skin_upload_requests(char_name, skin_uploads,
-                                             cat="Skin portraits"):
-        skin.portrait = skin.name_cn
 
+def add_skins_without_images(original_skins: list[SkinInfo], skin_list: list[SkinInfo]) -> list[SkinInfo]:
+    skin_list = list(skin_list)
     skins_with_images = set(skin.id for skin in skin_list)
     # Add back some skins without images
     for skin in original_skins:
@@ -122,12 +177,12 @@ def upload_skins(char_name: str, skin_list: list[SkinInfo]) -> list[SkinInfo]:
         if ENGLISH.code not in skin.name:
             continue
         skin_list.append(skin)
+    return skin_list
 
-    icons: list[int] = []
-    for skin in skin_list:
-        icons.append(skin.id)
-    upload_item_icons(icons)
 
+def upload_skins(char_name: str, skin_list: list[SkinInfo]) -> list[SkinInfo]:
+    skin_list = add_skins_without_images(skin_list, sync_skin_images({char_name: skin_list})[char_name])
+    upload_item_icons([skin.id for skin in skin_list])
     return skin_list
 
 
@@ -138,45 +193,18 @@ def upload_skin_screenshot(source_url: str, target: FilePage, text: str, summary
     if source_ext == target_ext:
         upload_file(text, target, summary, url=source_url)
         return
-    source_file = temp_download_dir / f"temp.{source_ext}"
-    download_file(source_url, source_file)
-    temp_file = temp_file_dir / f"temp.{target_ext}"
-    subprocess.run(["magick", source_file, temp_file], check=True)
-    assert temp_file.exists()
-    upload_file(text, target, summary=summary, file=temp_file)
-    source_file.unlink()
-    temp_file.unlink()
-
-
-def process_skin_upload_requests(char_name: str, skins: list[SkinUpload],
-                                 default_text: str = None,
-                                 cat: str = "Skin screenshots",
-                                 summary: str = "upload file from bwiki") -> list[SkinInfo]:
-    existing_source = set(p.title()
-                          for p in PreloadingGenerator(skin.source for skin in skins)
-                          if p.exists())
-    existing_targets = set(p.title()
-                           for p in PreloadingGenerator(skin.target for skin in skins)
-                           if p.exists())
-    skin_list: list[SkinInfo] = []
-    for skin in skins:
-        if skin.target.title() not in existing_targets:
-            if skin.source.title() not in existing_source:
-                continue
-            text = default_text \
-                if default_text is not None \
-                else (f"Taken from [https://wiki.biligame.com/klbq/"
-                      f"{skin.source.title(with_ns=True, underscore=True)} bwiki], "
-                      f"this image is licensed under CC BY-NC-SA 4.0."
-                      f"[[Category:{char_name} images]]")
-            text += f"\n[[Category:{cat}]]"
-            upload_skin_screenshot(skin.source.get_file_url(), skin.target, text, summary)
-        skin_list.append(skin.skin)
-    return skin_list
+    # every call gets its own directory so that uploads can run concurrently
+    with tempfile.TemporaryDirectory(dir=temp_file_dir) as temp_dir:
+        source_file = Path(temp_dir) / f"source.{source_ext}"
+        download_file(source_url, source_file)
+        temp_file = Path(temp_dir) / f"converted.{target_ext}"
+        subprocess.run(["magick", source_file, temp_file], check=True)
+        assert temp_file.exists()
+        upload_file(text, target, summary=summary, file=temp_file)
 
 
 def localize_skins(skin_list: list[SkinInfo]):
-    i18n = merge_dict2(get_all_game_json('RoleSkin'), get_all_game_json('Goods'))
+    i18n = merge_i18n(get_all_game_json('RoleSkin'), get_all_game_json('Goods'))
     for skin in skin_list:
         name = skin.name
         description = skin.description
@@ -191,12 +219,15 @@ def localize_skins(skin_list: list[SkinInfo]):
 
 def generate_skins():
     skins = parse_skin_tables()
+    skins_with_images = sync_skin_images(skins)
+    # parse_skin_tables() is shared with other tasks, so the cached lists are left untouched
+    result: dict[str, list[SkinInfo]] = {}
     for char_name, skin_list in skins.items():
-        skin_list2: list[SkinInfo] = upload_skins(char_name, skin_list)
+        skin_list2: list[SkinInfo] = add_skins_without_images(skin_list, skins_with_images[char_name])
         skin_list2.sort(key=lambda x: x.quality if x.quality != 0 else 100, reverse=True)
-        skin_list.clear()
-        skin_list.extend(skin_list2)
-    split_and_save_dict("Module:CharacterSkins/data{}.json", skins)
+        result[char_name] = skin_list2
+    upload_item_icons([skin.id for skin_list in result.values() for skin in skin_list])
+    split_and_save_dict("Module:CharacterSkins/data{}.json", result)
     print("Skins done")
 
 
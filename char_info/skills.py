@@ -1,6 +1,6 @@
 import re
-import subprocess
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Final
 
 import wikitextparser as wtp
@@ -10,13 +10,18 @@ from wikitextparser import parse
 from global_config import char_id_mapper, Character, get_characters
 from utils.asset_utils import global_resources_root
 from utils.general_utils import get_char_pages2
+from utils.image_pipeline import ImageSteps, process_images
 from utils.json_utils import get_game_json, get_all_game_json, get_table_global
-from utils.lang import get_language
+from utils.lang import Language, get_language
 from utils.lang_utils import get_multilanguage_dict, get_text
+from utils.page_cache import page_info_cache
+from utils.page_transform import register_page_transform, transform_pages
 from utils.upload_utils import UploadRequest, process_uploads
 from utils.wiki_utils import s, save_lua_table, save_json_page
 from utils.wtp_utils import get_templates_by_name
 
+SKILL_ICON_STEPS: Final[ImageSteps] = [("colorize", {"color": "#efcb5d"})]
+
 
 @dataclass
 class Skill:
@@ -121,15 +126,20 @@ def make_skills() -> None:
 
 def upload_skill_icons():
     skill_root = global_resources_root / "Skill"
-    subprocess.run(["magick", "mogrify", "-fill", "#efcb5d", "-colorize", "100%", "*.png"],
-                   shell=True, check=True, cwd=skill_root)
-    requests: list[UploadRequest] = []
+    icons: dict[FilePage, Path] = {}
     for char_id, char_name in char_id_mapper.items():
         for num in [1, 2, 3, 9]:
             source = skill_root / f"T_Dynamic_Skill_{char_id}{num:02}.png"
-            target = FilePage(s, f"File:{char_name}_Skill_{num}.png")
-            req = UploadRequest(source, target, text="", comment="batch upload skill icons")
-            requests.append(req)
+            icons[FilePage(s, f"File:{char_name}_Skill_{num}.png")] = source
+    # only colorize icons that are not on the wiki yet
+    cache = page_info_cache(s)
+    cache.prefetch(icons.keys())
+    icons = dict((target, source) for target, source in icons.items() if not cache.exists(target))
+    colorized = process_images(list(icons.values()), SKILL_ICON_STEPS)
+    requests: list[UploadRequest] = []
+    for target, source in icons.items():
+        req = UploadRequest(colorized[source], target, text="", comment="batch upload skill icons")
+        requests.append(req)
     process_uploads(requests)
 
 
@@ -157,40 +167,38 @@ Growth_Team
     :return:
     """
     lang = get_language()
+    save = False
+    if pages is None:
+        pages = get_char_pages2(lang=lang)
+        save = True
+    transform_pages(pages, "string_energy_network", lang, save=save, summary="generate string energy network")
+
+
+@register_page_transform("string_energy_network")
+def fill_string_energy_network(char: Character, parsed: wtp.WikiText, lang: Language) -> None:
+    # FIXME: bwiki api is too slow
+    # bwiki_base_page = Page(bwiki(), en_name_to_zh[char_name])
+    # if bwiki_base_page.isRedirectPage():
+    #     bwiki_base_page = bwiki_base_page.getRedirectTarget()
+    # bwiki_page = Page(bwiki(), bwiki_base_page.title() + "/弦能增幅网络")
+    # assert bwiki_page.exists(), char_name
+    if char.id >= 300:
+        return
+    templates = get_templates_by_name(parsed, "StringEnergyNetwork")
+    if len(templates) != 1:
+        print("Template StringEnergyNetwork not found on " + char.name)
+        return
     i18n = get_game_json(lang)['ST_GrowthDefine']
     i18n_skill = get_game_json(lang)['Skill']
     role_json = get_table_global("Role")
     skill_json = get_table_global("Skill")
     growth_bomb = get_table_global("Growth_Bomb")
-    save = False
-    if pages is None:
-        pages = get_char_pages2(lang=lang)
-        save = True
-    for char, p in pages:
-        char_id = char.id
-        char_name = char.name
-        # FIXME: bwiki api is too slow
-        # bwiki_base_page = Page(bwiki(), en_name_to_zh[char_name])
-        # if bwiki_base_page.isRedirectPage():
-        #     bwiki_base_page = bwiki_base_page.getRedirectTarget()
-        # bwiki_page = Page(bwiki(), bwiki_base_page.title() + "/弦能增幅网络")
-        # assert bwiki_page.exists(), char_name
-        if char.id < 300:
-            parsed = wtp.parse(p.text)
-            templates = get_templates_by_name(parsed, "StringEnergyNetwork")
-            if len(templates) != 1 :
-                print("Template StringEnergyNetwork not found on " + char_name)
-                continue
-            t = templates[0]
-            char_string_energy_network(char_id, char_name, growth_bomb, i18n, i18n_skill, p, role_json, skill_json, t)
-            if p.text.strip() == str(parsed).strip():
-                continue
-            p.text = str(parsed)
-            if save:
-                p.save(summary="generate string energy network", minor=True)
-
-
-def char_string_energy_network(char_id, char_name, growth_bomb, i18n, i18n_skill, p, role_json, skill_json, t):
+    # the template's original text is enough to look up existing icons and awakenings
+    t = templates[0]
+    char_string_energy_network(char.id, char.name, growth_bomb, i18n, i18n_skill, str(t), role_json, skill_json, t)
+
+
+def char_string_energy_network(char_id, char_name, growth_bomb, i18n, i18n_skill, text, role_json, skill_json, t):
     part: wtp.Template | None = None
     char_growth = growth_bomb[char_id]
 
@@ -226,7 +234,7 @@ def char_string_energy_network(char_id, char_name, growth_bomb, i18n, i18n_skill
         add_arg("name", upgrade_name)
         # FIXME: bwiki api is too slow
         # add_arg("icon", re.search(rf"icon{part_index + 1}=(\d)+", bwiki_page.text).group(1))
-        add_arg("icon", re.search(rf"group{arg_index}=.*icon=(\d)", p.text).group(1))
+        add_arg("icon", re.search(rf"group{arg_index}=.*icon=(\d)", text).group(1))
 
         descriptions = char_growth[f'Part{part_num}Desc']
         for index, description in enumerate(descriptions, 1):
@@ -269,7 +277,7 @@ def char_string_energy_network(char_id, char_name, growth_bomb, i18n, i18n_skill
         arg_index += 1
     # process awakenings
     awakening_template_name = "StringEnergyNetwork/awakening"
-    original_templates = get_templates_by_name(parse(p.text), awakening_template_name)
+    original_templates = get_templates_by_name(parse(text), awakening_template_name)
     wake_ids = role_json[char_id]["SkillWake"]
     for wake_index, wake_id in enumerate(wake_ids, 1):
         if len(original_templates) >= wake_index:
@@ -5,78 +5,90 @@ from global_config import Character
 from utils.general_utils import get_default_weapon_id, get_weapon_name, \
     get_weapon_type, get_char_pages, get_char_pages2
 from utils.json_utils import get_game_json
-from utils.lang import ENGLISH, get_language
-from utils.lang_utils import RedirectRequest, redirect_pages
+from utils.lang import ENGLISH, Language, get_language
+from utils.page_transform import register_page_transform, transform_pages
 from utils.wiki_utils import save_json_page
 from utils.wtp_utils import get_templates_by_name
 
 
-def generate_weapons(pages: list[tuple[Character, Page]] = None):
+def upload_char_weapons(characters: list[Character]) -> dict:
+    """
+    Upload weapon images once for all languages.
+    :return: transform context with the ids of characters whose weapon is available
+    """
     from utils.upload_utils import upload_weapon
-    lang = get_language()
-    i18n = get_game_json(lang)['Weapon']
-    redirect_requests: list[RedirectRequest] = []
-    save = False
-    data: dict = {}
-    if pages is None:
-        pages = get_char_pages2(lang=lang)
-        save = True
-    for char, p in pages:
-        char_id = char.id
-        char_name = char.name
-        parsed = wtp.parse(p.text)
-        templates = get_templates_by_name(parsed, "PrimaryWeapon")
-        if len(templates) == 0:
-            print(f"No template found on {p.title()}")
-            continue
-        t = templates[0]
-
-        weapon_id = get_default_weapon_id(char_id)
+    uploaded: set[int] = set()
+    for char in characters:
+        weapon_id = get_default_weapon_id(char.id)
         if weapon_id == -1:
             continue
-        result = upload_weapon(char_name, weapon_id)
-        if not result:
-            continue
+        if upload_weapon(char.name, weapon_id):
+            uploaded.add(char.id)
+    return {"uploaded": uploaded}
 
-        try:
-            weapon_name = get_weapon_name(weapon_id, lang)
-            weapon_description = i18n.get(f"{weapon_id}_Tips", "")
-            weapon_type = get_weapon_type(weapon_id)
-
-            weapon_name_en = get_weapon_name(weapon_id, ENGLISH)
-            assert weapon_name is not None and weapon_name_en is not None, f"Unexpected name CN: {weapon_name} and name EN: {weapon_name_en}"
-            if weapon_name_en != weapon_name:
-                redirect_requests.append(RedirectRequest(lang, weapon_name, weapon_name_en))
-        except Exception as e:
-            print(f"Failed to generate weapon for {char_name} due to {e}")
-            continue
 
-        def add_arg(name, value):
-            if t.has_arg(name) and value.strip() == "":
-                return
-            t.set_arg(name, value + "\n")
+@register_page_transform("weapon", prepare=upload_char_weapons)
+def fill_weapon(char: Character, parsed: wtp.WikiText, lang: Language, uploaded: set[int]) -> dict | None:
+    """
+    :return: weapon data for Module:CharWeapon/data.json
+    """
+    templates = get_templates_by_name(parsed, "PrimaryWeapon")
+    if len(templates) == 0:
+        print(f"No template found on {char.name} ({lang.code})")
+        return None
+    t = templates[0]
+    if char.id not in uploaded:
+        return None
+    weapon_id = get_default_weapon_id(char.id)
 
-        add_arg("Name", weapon_name)
-        add_arg("Description", weapon_description)
-        add_arg("Type", weapon_type)
+    try:
+        i18n = get_game_json(lang)['Weapon']
+        weapon_name = get_weapon_name(weapon_id, lang)
+        weapon_description = i18n.get(f"{weapon_id}_Tips", "")
+        weapon_type = get_weapon_type(weapon_id)
 
-        data[char_name] = {
-            "name": weapon_name,
-            "description": weapon_description,
-            "type": weapon_type,
-        }
+        weapon_name_en = get_weapon_name(weapon_id, ENGLISH)
+        assert weapon_name is not None and weapon_name_en is not None, f"Unexpected name CN: {weapon_name} and name EN: {weapon_name_en}"
+    except Exception as e:
+        print(f"Failed to generate weapon for {char.name} due to {e}")
+        return None
 
-        if p.text.strip() == str(parsed).strip():
-            continue
-        p.text = str(parsed)
-        if save:
-            p.save(summary="generate weapon", minor=True)
+    def add_arg(name, value):
+        if t.has_arg(name) and value.strip() == "":
+            return
+        t.set_arg(name, value + "\n")
+
+    add_arg("Name", weapon_name)
+    add_arg("Description", weapon_description)
+    add_arg("Type", weapon_type)
+
+    return {
+        "name": weapon_name,
+        "description": weapon_description,
+        "type": weapon_type,
+    }
+
+
+def save_weapon_data(results: dict[str, dict | None]) -> None:
+    """
+    :param results: character name to weapon data of English pages
+    """
+    data = dict((char_name, d) for char_name, d in results.items() if d is not None)
+    save_json_page("Module:CharWeapon/data.json", data)
+
+
+def generate_weapons(pages: list[tuple[Character, Page]] = None):
+    lang = get_language()
+    save = False
+    if pages is None:
+        pages = get_char_pages2(lang=lang)
+        save = True
+    results = transform_pages(pages, "weapon", lang, save=save, summary="generate weapon")
 
     if lang == ENGLISH:
-        save_json_page("Module:CharWeapon/data.json", data)
+        save_weapon_data(results)
 
-    # Do NOT redirect: weapon pages are not yet ready
-    # redirect_pages(redirect_requests)
+    # Do NOT redirect weapon names to English names: weapon pages are not yet ready
 
 
 if __name__ == '__main__':
@@ -1,10 +1,11 @@
-from char_info.char_infobox import generate_infobox
+import char_info.char_infobox  # registers the infobox page transform
 from char_info.dorm import generate_bond_items, generate_gifts, generate_friendship_gifts
 from char_info.gallery import generate_skins
 from char_info.emote import generate_emotes
-from char_info.skills import generate_string_energy_network, make_skills
+from char_info.skills import make_skills
 from char_info.story import generate_return_letter, generate_biography
-from char_info.weapons import generate_weapons
+from char_info.weapons import save_weapon_data
+from global_config import get_characters
 from page_generator.achievements import generate_all_achievements
 from page_generator.badges import upload_all_badges
 from page_generator.battle_pass import make_battle_pass_seasons
@@ -18,65 +19,94 @@ from page_generator.shop import make_gacha_drop_data, make_gacha_banners
 from page_generator.strinova_comms import strinova_comms_main
 from page_generator.translations import generate_translations
 from page_generator.weapons import process_weapon_pages, process_weapon_skins, upload_weapon_white_icons
-from utils.general_utils import get_char_pages2
-from utils.lang import available_languages, set_language
+from utils.general_utils import fetch_char_pages
+from utils.job_runner import JobRunner, Task
+from utils.lang import ENGLISH, available_languages
+from utils.page_transform import run_page_transforms
+
+
+def misc_upload_tasks() -> list[Task]:
+    return [
+        Task("upload_all_badges", upload_all_badges),
+        Task("make_all_decals", make_all_decals),
+        Task("make_id_cards", make_id_cards),
+        Task("process_interactive_props", process_interactive_props),
+        Task("upload_weapon_white_icons", upload_weapon_white_icons),
+    ]
 
 
 def misc_uploads():
-    upload_all_badges()
-    make_all_decals()
-    make_id_cards()
-    process_interactive_props()
-    upload_weapon_white_icons()
+    JobRunner("misc_uploads", misc_upload_tasks()).run()
+
+
+def character_info_part1_tasks() -> list[Task]:
+    return [
+        Task("make_skills", make_skills),
+        Task("generate_biography", generate_biography),
+        Task("generate_bond_items", generate_bond_items),
+        Task("generate_return_letter", generate_return_letter),
+        Task("generate_all_achievements", generate_all_achievements),
+        Task("generate_gifts", generate_gifts),
+        Task("generate_emotes", generate_emotes),
+        Task("generate_skins", generate_skins),
+        Task("generate_friendship_gifts", generate_friendship_gifts),
+        # need transition to lua?
+        Task("strinova_comms_main", strinova_comms_main),
+    ]
 
 
 def character_info_part1():
-    make_skills()
-    generate_biography()
-    generate_bond_items()
-    generate_return_letter()
-    generate_all_achievements()
-    generate_gifts()
-    generate_emotes()
-    generate_skins()
-    generate_friendship_gifts()
-    # need transition to lua?
-    strinova_comms_main()
+    JobRunner("character_info_part1", character_info_part1_tasks()).run()
 
 
 def character_info_part2():
-    for lang in available_languages:
-        set_language(lang)
-        pages = get_char_pages2(lang=lang)
-        originals = set(p.text for _, p in pages)
+    """
+    Fill the infobox, string energy network and weapon of every character page in every language.
+    Each page is parsed once and saved once, and all pages are processed in parallel.
+    """
+    char_pages = fetch_char_pages(languages=available_languages)
+    pages = dict((lang, [(c, char_pages[(c.id, "", lang.code)]) for c in get_characters()])
+                 for lang in available_languages)
+    results = run_page_transforms(pages, ["infobox", "string_energy_network", "weapon"],
+                                  summary="Update character page")
+    save_weapon_data(dict((char_name, r["weapon"]) for (lang_code, char_name), r in results.items()
+                          if lang_code == ENGLISH.code))
 
-        generate_infobox(pages)
-        generate_string_energy_network(pages)
-        generate_weapons(pages)
 
-        for c, p in pages:
-            if p.text not in originals:
-                p.save(summary="Update character page")
+def character_info_tasks() -> list[Task]:
+    part1 = character_info_part1_tasks()
+    # part 2 transforms pages in a process pool, so nothing else may run at the same time
+    return part1 + [Task("character_info_part2", character_info_part2, [t.name for t in part1], exclusive=True)]
 
 
 def make_all_character_info():
-    character_info_part1()
-    character_info_part2()
+    JobRunner("character_info", character_info_tasks()).run()
+
+
+def make_everything_tasks() -> list[Task]:
+    return character_info_tasks() + [
+        Task("process_chat_bubbles", process_chat_bubbles),
+        Task("generate_translations", generate_translations),
+        # the item registry is built from the skin tables, so it is only built once the skins are done
+        Task("save_all_items", save_all_items, ["generate_skins"]),
+        Task("save_wiki_events", save_wiki_events),
+        Task("process_weapon_pages", process_weapon_pages),
+        Task("process_weapon_skins", process_weapon_skins, ["process_weapon_pages"]),
+    ] + misc_upload_tasks() + [
+        # these read the item registry as well
+        Task("make_gacha_drop_data", make_gacha_drop_data, ["save_all_items"]),
+        Task("make_gacha_banners", make_gacha_banners, ["make_gacha_drop_data"]),
+        Task("make_battle_pass_seasons", make_battle_pass_seasons, ["save_all_items"]),
+    ]
 
 
-def make_everything():
-    make_all_character_info()
-    process_chat_bubbles()
-    generate_translations()
-    save_all_items()
-    save_wiki_events()
-    process_weapon_pages()
-    process_weapon_skins()
-    misc_uploads()
-    make_gacha_drop_data()
-    make_gacha_banners()
-    make_battle_pass_seasons()
+def make_everything(resume: bool = True, workers: int = 4):
+    """
+    :param resume: continue after the tasks that completed in the last failed run
+    :param workers: number of tasks that may run at the same time
+    """
+    JobRunner("make_everything", make_everything_tasks(), workers=workers).run(resume=resume)
 
 
 if __name__ == "__main__":
-    make_everything()
\ No newline at end of file
+    make_everything()
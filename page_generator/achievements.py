@@ -6,7 +6,7 @@ from pywikibot import FilePage
 
 from utils.asset_utils import resource_root
 from utils.general_utils import get_char_by_id
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.json_utils import get_all_game_json, get_dual_table, parse_dual_table
 from utils.lang_utils import get_multilanguage_dict, StringConverters, compose, get_text
 from utils.upload_utils import UploadRequest, process_uploads
 from utils.wiki_utils import s, save_json_page
@@ -34,23 +34,22 @@ def get_i18n() -> dict:
 
 
 @cache
-def parse_achievements(use_cn: bool = False) -> list[Achievement]:
+def parse_all_achievements() -> tuple[dict[int, Achievement], dict[int, Achievement]]:
     i18n = get_i18n()
-    if use_cn:
-        achievement_table = get_table("Achievement")
-    else:
-        achievement_table = get_table_global("Achievement")
-    achievements = []
-    for key, value in achievement_table.items():
+    role_names: dict[int, str] = {}
+
+    def parse_achievement(key: int, value: dict) -> Achievement:
         role_id: int = value['Role']
-        role_name = get_char_by_id(role_id)
+        if role_id not in role_names:
+            role_names[role_id] = get_char_by_id(role_id)
+        param = value['Param2']
 
         def sub_condition(string: str):
             if "{0}" in string:
-                string = string.format(value['Param2'][0])
+                string = string.format(param[0])
                 return re.sub(r"<Chat-Self>(\d+)</>", lambda match: match.group(1), string)
             if "[1]" in string:
-                string = string.replace("[1]", str(value['Param2'][0]))
+                string = string.replace("[1]", str(param[0]))
                 return string
             return string
 
@@ -58,10 +57,15 @@ def parse_achievements(use_cn: bool = False) -> list[Achievement]:
         name = get_text(i18n, value['Name'], converter=converter)
         unlock = get_text(i18n, value['Explain'], converter=converter)
         details = get_text(i18n, value['Details'], converter=converter)
-        achievement = Achievement(key, value['Level'], value['Type'], value['Quality'], role_id, role_name,
-                                  name, unlock, details)
-        achievements.append(achievement)
-    return achievements
+        return Achievement(key, value['Level'], value['Type'], value['Quality'], role_id, role_names[role_id],
+                           name, unlock, details)
+
+    return parse_dual_table(get_dual_table("Achievement"), parse_achievement)
+
+
+def parse_achievements(use_cn: bool = False) -> list[Achievement]:
+    cn, gl = parse_all_achievements()
+    return list((cn if use_cn else gl).values())
 
 
 def upload_achievements(achievements: list[Achievement]) -> None:
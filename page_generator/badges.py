@@ -3,7 +3,7 @@ from functools import cache
 
 from pywikibot import FilePage
 
-from utils.asset_utils import resource_root
+from utils.asset_index import resolve_asset
 from utils.json_utils import get_all_game_json, get_table
 from utils.lang_utils import get_text
 from utils.upload_utils import UploadRequest, process_uploads
@@ -48,13 +48,13 @@ def upload_all_badges():
     badges = get_all_badges()
     requests: list[UploadRequest] = []
     for b in badges.values():
-        source = resource_root / "Achievement" / f"T_Dynamic_Achievement_{b.id}.png"
-        if not source.exists():
+        source = resolve_asset("achievement", b.id)
+        if source is None:
             continue
         requests.append(UploadRequest(source,
                                       FilePage(s, b.file),
                                       '[[Category:Achievement icons]]'))
-    process_uploads(requests)
+    process_uploads(requests, job="badges")
 
 
 def main():
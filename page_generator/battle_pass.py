@@ -1,9 +1,9 @@
 import re
 from dataclasses import dataclass
 
-from page_generator.items import get_all_items, Item
+from page_generator.items import get_item_registry, Item
 from utils.general_utils import parse_ticks
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.json_utils import get_all_game_json, get_table_global, get_dual_table
 from utils.lang import ENGLISH, CHINESE, LanguageVariants
 from utils.lang_utils import get_text, get_english_version
 from utils.wiki_utils import save_page, save_json_page
@@ -34,13 +34,12 @@ class BattlePassSeason:
 
 
 def parse_battle_pass_rewards(use_cn: bool = False) -> dict[int, list[BattlePassLevel]]:
-    all_items = get_all_items()
+    """
+    :return: season to its battle pass levels, ordered by level
+    """
+    all_items = get_item_registry()
     result = {}
-    if use_cn:
-        table = get_table("BattlePassPrize")
-    else:
-        table = get_table_global("BattlePassPrize")
-    for k, v in table.items():
+    for k, v in get_dual_table("BattlePassPrize").get(use_cn).items():
         season: int = v['Season']
         if season not in result:
             result[season] = []
@@ -56,6 +55,8 @@ def parse_battle_pass_rewards(use_cn: bool = False) -> dict[int, list[BattlePass
                 item = all_items[item_id]
                 rewards.append(BattlePassReward(item, item_amount, prize_type))
         result[season].append(BattlePassLevel(int(k), season, level, rewards))
+    for levels in result.values():
+        levels.sort(key=lambda x: x.level)
     return result
 
 
@@ -82,7 +83,6 @@ def parse_battle_pass_seasons() -> list[BattlePassSeason]:
 def generate_battle_pass_page(use_cn: bool = False) -> str:
     result = []
     for season, battle_pass_levels in parse_battle_pass_rewards(use_cn).items():
-        battle_pass_levels.sort(key=lambda x: x.level)
         result.append(f"==Season {season}==")
         result.append("{{BattlePass|")
         for r in battle_pass_levels:
@@ -112,7 +112,6 @@ def make_battle_pass_rewards():
     result: dict[int, list[dict]] = {}
     for season, battle_pass_levels in rewards.items():
         result[season] = []
-        battle_pass_levels.sort(key=lambda x: x.level)
         for level in battle_pass_levels:
             for reward in level.rewards:
                 item = reward.item.name
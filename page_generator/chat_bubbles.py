@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from functools import cache
 
-from utils.asset_utils import global_resources_root
+from utils.asset_index import resolve_asset
 from utils.json_utils import get_table, get_all_game_json
 from utils.lang_utils import get_text
 from utils.upload_utils import UploadRequest, process_uploads
@@ -40,8 +40,8 @@ def upload_chat_bubbles():
     bubbles = parse_chat_bubbles()
     uploads = []
     for bubble in bubbles:
-        local_file = global_resources_root / "ChatBubbles" / "ChatBubblesIcon" / f"T_Dynamic_ChatBubblesIcon_{bubble.id}.png"
-        if not local_file.exists():
+        local_file = resolve_asset("chat_bubble", bubble.id)
+        if local_file is None:
             continue
         uploads.append(UploadRequest(local_file, bubble.file, '[[Category:Chat bubbles]]'))
     process_uploads(uploads)
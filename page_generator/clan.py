@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-from page_generator.items import get_all_items, get_en_items
+from page_generator.items import get_item_registry
 from utils.json_utils import get_table, get_table_global
 from utils.lang import ENGLISH
 
@@ -15,7 +15,7 @@ class ClanLevel:
 
 def parse_clan_levels():
     table = get_table_global("ClanLevelCfg")
-    all_items = get_all_items()
+    all_items = get_item_registry()
     result = []
     for _, v in table.items():
         level = v['Level']
@@ -1,10 +1,10 @@
 from dataclasses import dataclass, field
-from functools import cache
 
 from pywikibot import FilePage
 
-from utils.asset_utils import resource_root, global_resources_root
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.asset_index import resolve_asset
+from utils.cache_utils import locked_cache
+from utils.json_utils import get_all_game_json, get_dual_table, parse_dual_table
 from utils.lang_utils import StringConverters, compose, get_text
 from utils.upload_utils import UploadRequest, process_uploads
 from utils.wiki_utils import s, save_json_page
@@ -26,33 +26,33 @@ class Decal:
         return self.file
 
 
-@cache
-def get_all_decals(use_cn: bool = True) -> dict[int, Decal]:
-    if use_cn:
-        decal_json = get_table("Decal")
-    else:
-        decal_json = get_table_global("Decal")
-    decals: dict[int, Decal] = {}
+@locked_cache
+def parse_decals() -> tuple[dict[int, Decal], dict[int, Decal]]:
     i18n = get_all_game_json("Decal")
-    for decal_id, v in decal_json.items():
+
+    def parse_decal(decal_id: int, v: dict) -> Decal:
         decal = Decal(decal_id)
-        decals[decal_id] = decal
         decal.name = get_text(i18n, v['Name'])
         decal.description = get_text(i18n, v['Desc'],
                                      converter=compose(StringConverters.basic_converter,
                                                        StringConverters.newline_to_br))
         decal.quality = v['Quality']
-    return decals
+        return decal
+
+    return parse_dual_table(get_dual_table("Decal"), parse_decal)
+
+
+def get_all_decals(use_cn: bool = True) -> dict[int, Decal]:
+    cn, gl = parse_decals()
+    return cn if use_cn else gl
 
 
 def upload_all_decals(decals: dict[int, Decal]):
     requests: list[UploadRequest] = []
     for d in decals.values():
-        source = resource_root / "Decal" / "PaintingListDecal" / f"T_Dynamic_Decal_{d.id}.png"
-        if not source.exists():
-            source = global_resources_root / "Decal" / "PaintingListDecal" / f"T_Dynamic_Decal_{d.id}.png"
-            if not source.exists():
-                continue
+        source = resolve_asset("decal", d.id)
+        if source is None:
+            continue
         requests.append(UploadRequest(source,
                                       FilePage(s, d.file),
                                       '[[Category:Decal icons]]'))
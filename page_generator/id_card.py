@@ -1,9 +1,10 @@
 import enum
 from dataclasses import dataclass, field
-from functools import cache
 
+from utils.asset_index import asset_exists
 from utils.asset_utils import resource_root, global_resources_root
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.cache_utils import locked_cache
+from utils.json_utils import get_all_game_json, get_dual_table, parse_dual_table
 from utils.lang_utils import compose, StringConverters, get_text
 from utils.upload_utils import UploadRequest, process_uploads
 from utils.wiki_utils import save_json_page
@@ -33,12 +34,11 @@ class IdCard:
         return f"File:IdCard {self.id}.png"
 
 
-@cache
-def get_all_id_cards(use_cn: bool = True) -> dict[int, IdCard]:
-    id_card_json = get_table("IdCard") if use_cn else get_table_global("IdCard")
+@locked_cache
+def parse_id_cards() -> tuple[dict[int, IdCard], dict[int, IdCard]]:
     i18n = get_all_game_json("IdCard")
-    id_cards: dict[int, IdCard] = {}
-    for id_card_id, v in id_card_json.items():
+
+    def parse_id_card(id_card_id: int, v: dict) -> IdCard | None:
         id_card_type = IdCardType.AVATAR if "::Avatar" in v['Type'] else IdCardType.FRAME
         try:
             id_card = IdCard(id_card_id)
@@ -51,10 +51,16 @@ def get_all_id_cards(use_cn: bool = True) -> dict[int, IdCard]:
             id_card.unlock = get_text(i18n, v["GainParam2"],
                                       converter=compose(StringConverters.basic_converter,
                                                         StringConverters.all_caps_remove))
-            id_cards[id_card_id] = id_card
+            return id_card
         except Exception:
-            pass
-    return id_cards
+            return None
+
+    return parse_dual_table(get_dual_table("IdCard"), parse_id_card)
+
+
+def get_all_id_cards(use_cn: bool = True) -> dict[int, IdCard]:
+    cn, gl = parse_id_cards()
+    return cn if use_cn else gl
 
 
 def upload_all_id_cards(id_cards: dict[int, IdCard], use_cn: bool = True):
@@ -77,11 +83,11 @@ def upload_all_id_cards(id_cards: dict[int, IdCard], use_cn: bool = True):
         suffix = "" if d.type == IdCardType.AVATAR else "_L"
         source_full = cur_root / f"T_Dynamic_IdCard_{d.id}{suffix}.png"
 
-        if source_icon.exists():
+        if asset_exists(source_icon):
             requests.append(UploadRequest(source_icon,
                                           d.icon,
                                           '[[Category:Item icons]]'))
-        if source_full.exists():
+        if asset_exists(source_full):
             requests.append(UploadRequest(source_full,
                                           d.full_file,
                                           '[[Category:IdCard images]]'))
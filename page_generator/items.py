@@ -1,19 +1,24 @@
+import hashlib
 import re
 from dataclasses import dataclass, field
 from functools import cache
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Mapping
 
 from audio.audio_parser import parse_role_voice
 from audio.voice import Voice
 from char_info.gallery import parse_skin_tables, SkinInfo
 from char_info.emote import Emote, parse_emotes
+from global_config import char_id_mapper
 from page_generator.badges import get_all_badges, Badge
 from page_generator.chat_bubbles import ChatBubble, parse_chat_bubbles
 from page_generator.decal import get_all_decals, Decal
 from page_generator.id_card import get_all_id_cards, IdCard
 from page_generator.interactive_props import InteractiveProp, parse_interactive_props
 from page_generator.weapons import Weapon, parse_weapons
-from utils.dict_utils import merge_dict2
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.cache_utils import load_pickle_cache, save_pickle_cache, locked_cache
+from utils.dict_utils import merge_i18n
+from utils.json_utils import get_all_game_json, get_table, get_table_global, table_fingerprint
 from utils.lang import ENGLISH
 from utils.lang_utils import get_text
 from utils.wiki_utils import save_json_page
@@ -43,7 +48,7 @@ class Item:
 @cache
 def parse_items() -> dict[int, Item]:
     items: dict[int, Item] = {}
-    i18n = merge_dict2(get_all_game_json("Item"), get_all_game_json("Goods"))
+    i18n = merge_i18n(get_all_game_json("Item"), get_all_game_json("Goods"))
 
     def process_json(d: dict):
         for item_id, v in d.items():
@@ -78,49 +83,132 @@ def parse_currencies() -> dict[int, Item]:
     return currencies
 
 
-@cache
-def get_all_items() -> dict[int, Item | Badge | Decal | SkinInfo | Weapon | Emote | IdCard]:
-    currencies = parse_currencies()
-    items = parse_items()
-    badges = get_all_badges()
-    decals = get_all_decals()
-    id_cards = get_all_id_cards()
-    skins: dict[int, SkinInfo] = {}
-    for _, skin_list in parse_skin_tables().items():
-        skin_list: list[SkinInfo]
-        for skin in skin_list:
-            skins[skin.id] = skin
-    weapons: dict[int, Weapon] = parse_weapons()
-    emotes: dict[int, Emote] = {}
-    for _, emote_list in parse_emotes().items():
-        for emote in emote_list:
-            emotes[emote.id] = emote
-    voices: dict[int, Voice] = {}
-    for vid, v in parse_role_voice().items():
-        voices[vid] = v
-    chat_bubbles: dict[int, ChatBubble] = {}
-    for b in parse_chat_bubbles():
-        chat_bubbles[b.id] = b
-    interactive_props: dict[int, InteractiveProp] = {}
-    for p in parse_interactive_props():
-        interactive_props[p.id] = p
-    # increasing order of specificity
-    return items | skins | badges | decals | id_cards | weapons | emotes | voices | currencies | chat_bubbles | interactive_props
+AnyItem = Item | Badge | Decal | SkinInfo | Weapon | Emote | IdCard | Voice | ChatBubble | InteractiveProp
 
+# Bump this whenever the parsers feeding the registry change
+ITEM_REGISTRY_VERSION = 4
 
-@cache
-def get_en_items() -> list[Item]:
-    items = get_all_items()
-    result = []
-    for item in items.values():
-        name = item.name or {}
-        name_en = name.get(ENGLISH.code, None)
-        if name_en is None:
-            continue
-        result.append(item)
+
+def by_id[T](items: Iterable[T]) -> dict[int, T]:
+    return dict((item.id, item) for item in items)
+
+
+@dataclass
+class ItemSource:
+    collect: Callable[[], dict[int, AnyItem]]
+    # CN and GL tables read by collect (see get_table and get_table_global)
+    tables: list[str] = field(default_factory=list)
+    global_tables: list[str] = field(default_factory=list)
+    # constants in code that collect depends on
+    constants: list[Any] = field(default_factory=list)
+
+
+# in increasing order of specificity, so later sources win on conflicting ids. The cached registry is
+# keyed by the tables and constants listed here, so they must cover everything collect reads.
+item_sources: list[ItemSource] = [
+    ItemSource(parse_items, ["Item", "Goods"], global_tables=["Item"]),
+    ItemSource(lambda: by_id(skin for skin_list in parse_skin_tables().values() for skin in skin_list),
+               ["RoleSkin"], constants=[char_id_mapper]),
+    ItemSource(get_all_badges, ["Badge"]),
+    ItemSource(get_all_decals, ["Decal"], global_tables=["Decal"]),
+    ItemSource(get_all_id_cards, ["IdCard"], global_tables=["IdCard"]),
+    ItemSource(parse_weapons, ["Weapon"], global_tables=["Role"], constants=[char_id_mapper]),
+    ItemSource(lambda: by_id(emote for emote_list in parse_emotes().values() for emote in emote_list),
+               ["Emote"], constants=[char_id_mapper]),
+    ItemSource(parse_role_voice, global_tables=["RoleVoice"]),
+    ItemSource(parse_currencies, ["Currency"]),
+    ItemSource(lambda: by_id(parse_chat_bubbles()), ["ChatBubbles"]),
+    ItemSource(lambda: by_id(parse_interactive_props()), ["InteractiveProps"]),
+]
+
+
+def collect_items() -> dict[int, AnyItem]:
+    result: dict[int, AnyItem] = {}
+    for source in item_sources:
+        result.update(source.collect())
     return result
 
 
+class ItemRegistry:
+    """
+    An index over every item known to the game. Items are stored once, by id; the indexes by
+    English name, quality and type (i.e. the class of the item, such as SkinInfo or Badge) hold
+    item ids. The items are the objects returned by the parsers, so they must not be modified.
+    """
+
+    def __init__(self, items: dict[int, AnyItem]):
+        self._items = items
+        self._by_name_en: dict[str, int] = {}
+        self._by_quality: dict[int, list[int]] = {}
+        self._by_type: dict[type, list[int]] = {}
+        for item_id, item in items.items():
+            name_en = (item.name or {}).get(ENGLISH.code, None)
+            if name_en is not None:
+                self._by_name_en.setdefault(name_en, item_id)
+            quality = -1 if item.quality is None else item.quality
+            self._by_quality.setdefault(quality, []).append(item_id)
+            self._by_type.setdefault(type(item), []).append(item_id)
+
+    @property
+    def items(self) -> Mapping[int, AnyItem]:
+        return MappingProxyType(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._items
+
+    def __getitem__(self, item_id: int) -> AnyItem:
+        return self._items[item_id]
+
+    def get(self, item_id: int, default: AnyItem | None = None) -> AnyItem | None:
+        return self._items.get(item_id, default)
+
+    def get_by_name_en(self, name: str) -> AnyItem | None:
+        item_id = self._by_name_en.get(name, None)
+        return self._items[item_id] if item_id is not None else None
+
+    def get_by_quality(self, quality: int) -> list[AnyItem]:
+        return [self._items[item_id] for item_id in self._by_quality.get(quality, [])]
+
+    def get_by_type(self, item_type: type) -> list[AnyItem]:
+        return [self._items[item_id] for item_id in self._by_type.get(item_type, [])]
+
+    def get_en_items(self) -> list[AnyItem]:
+        return [item for item in self._items.values() if (item.name or {}).get(ENGLISH.code, None) is not None]
+
+
+@locked_cache
+def get_item_registry() -> ItemRegistry:
+    """
+    The registry is persisted in the cache directory and rebuilt only when the game data it is
+    built from changes.
+    """
+    tables = set(t for source in item_sources for t in source.tables)
+    global_tables = set(t for source in item_sources for t in source.global_tables)
+    constants = repr([source.constants for source in item_sources])
+    key = table_fingerprint(tables=sorted(tables), global_tables=sorted(global_tables), version=ITEM_REGISTRY_VERSION)
+    key += hashlib.sha1(constants.encode("utf-8")).hexdigest()
+    registry = load_pickle_cache("item_registry", key)
+    if registry is None:
+        registry = ItemRegistry(collect_items())
+        save_pickle_cache("item_registry", key, registry)
+    return registry
+
+
+def get_all_items() -> Mapping[int, AnyItem]:
+    """
+    :return: a read-only view of every item by id, shared by all callers
+    """
+    return get_item_registry().items
+
+
+@cache
+def get_en_items() -> list[AnyItem]:
+    return get_item_registry().get_en_items()
+
+
 def save_all_items():
     items = get_en_items()
     result_name = {}
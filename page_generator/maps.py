@@ -2,11 +2,14 @@ from dataclasses import dataclass
 from typing import Iterable
 
 from pywikibot import Page
+from pywikibot.exceptions import PageCreatedConflictError
 
+from utils.asset_index import asset_exists
 from utils.asset_utils import resource_root
 from utils.json_utils import get_all_game_json, get_table_global
 from utils.lang import ENGLISH, get_language
 from utils.lang_utils import get_multilanguage_dict
+from utils.page_cache import page_info_cache
 from utils.upload_utils import UploadRequest, process_uploads
 from utils.wiki_utils import s
 
@@ -53,7 +56,7 @@ def upload_maps(maps: Iterable[Map]) -> list[Map]:
     for m in maps:
         source1 = resource_root / f"Map/Introduce/{m.intro}.png"
         source2 = resource_root / f"Map/Mini2D/{m.minimap}.png"
-        if not source1.exists() or not source2.exists():
+        if not asset_exists(source1) or not asset_exists(source2):
             print(f"{m.name_en} does not have a corresponding map file")
             continue
         requests.append(UploadRequest(source1, m.intro_file, "[[Category:Map intro images]]"))
@@ -65,11 +68,15 @@ def upload_maps(maps: Iterable[Map]) -> list[Map]:
 
 def make_map_pages(maps: Iterable[Map]):
     lang = get_language()
+    maps = list(maps)
+    cache = page_info_cache(s)
+    cache.prefetch(m.name_en + lang.page_suffix for m in maps)
+    missing = set(cache.confirm_missing(m.name_en + lang.page_suffix for m in maps))
     for m in maps:
         name_en = m.name_en
-        p = Page(s, name_en + lang.page_suffix)
-        if p.exists():
+        if name_en + lang.page_suffix not in missing:
             continue
+        p = Page(s, name_en + lang.page_suffix)
         result = ["{{MapTop|description=" + m.description[lang.code] + "}}",
                   "{{GameModes}}"]
         gallery = [
@@ -82,7 +89,11 @@ def make_map_pages(maps: Iterable[Map]):
         result.append("\n".join(gallery))
         result.append("{{MapBottom}}")
         p.text = "\n\n".join(result)
-        p.save("Create maps")
+        try:
+            p.save("Create maps", createonly=True)
+        except PageCreatedConflictError:
+            print(f"{p.title()} was created by someone else in the meantime. Skipping.")
+        cache.invalidate(p)
 
 
 def main():
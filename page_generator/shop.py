@@ -3,9 +3,9 @@ from datetime import datetime, timedelta
 from functools import cache
 
 from char_info.gallery import SkinInfo, parse_skin_tables
-from page_generator.items import Item, get_all_items
+from page_generator.items import Item, get_item_registry
 from utils.general_utils import parse_ticks
-from utils.json_utils import get_all_game_json, get_table, get_table_global
+from utils.json_utils import get_all_game_json, get_dual_table, parse_dual_table
 from utils.lang import ENGLISH, CHINESE
 from utils.lang_utils import compose, StringConverters, get_text
 from utils.wiki_utils import save_json_page
@@ -29,25 +29,27 @@ class Banner:
                 "{{#invoke:Gacha|main|" + str(self.group) + "|en|cn=1}}")
 
 
-def parse_banners(use_cn: bool = False) -> list[Banner]:
+@cache
+def parse_all_banners() -> tuple[dict[int, Banner], dict[int, Banner]]:
     i18n = get_all_game_json("Lottery")
-    result = []
-    table = get_table("Lottery").items() if use_cn else get_table_global("Lottery").items()
-    for k, v in table:
+    converter = compose(StringConverters.basic_converter, StringConverters.all_caps_remove)
+
+    def parse_banner(_: int, v: dict) -> Banner | None:
         if v['Type'] != 1:
-            continue
-        name = get_text(i18n, v['Name'],
-                        converter=compose(StringConverters.basic_converter,
-                                          StringConverters.all_caps_remove))
+            return None
+        name = get_text(i18n, v['Name'], converter=converter)
         if len(name) == 0:
-            continue
-
-        role_id = v['RoleId']
-
+            return None
         start = parse_ticks(v['Start']['Ticks'])
         end = parse_ticks(v['Finish']['Ticks'])
-        result.append(Banner(name, role_id, v['NormalDrop'], start, end))
-    return result
+        return Banner(name, v['RoleId'], v['NormalDrop'], start, end)
+
+    return parse_dual_table(get_dual_table("Lottery"), parse_banner)
+
+
+def parse_banners(use_cn: bool = False) -> list[Banner]:
+    cn, gl = parse_all_banners()
+    return list((cn if use_cn else gl).values())
 
 
 @cache
@@ -62,10 +64,11 @@ def reverse_skin_lookup_table() -> dict[int, str]:
 
 
 def get_role_legendary_skin(banner_id: int) -> str:
-    for drop in parse_gacha_drops()[banner_id]:
-        if drop.item.quality == 5 and isinstance(drop.item, SkinInfo):
-            role_name = reverse_skin_lookup_table()[drop.item.id]
-            return drop.item.get_mh_portrait_title(role_name)
+    skins = get_gacha_data().get_items(banner_id, 5, SkinInfo)
+    if len(skins) > 0:
+        skin: SkinInfo = skins[0]
+        role_name = reverse_skin_lookup_table()[skin.id]
+        return skin.get_mh_portrait_title(role_name)
     print(f"WARNING: No legendary skin found for banner {banner_id}")
     return ""
 
@@ -110,10 +113,12 @@ class GachaDrop:
 
 
 def parse_gacha_drops(use_cn: bool = False) -> dict[int, list[GachaDrop]]:
-    items = get_all_items()
+    """
+    :return: gacha group id to its drops, ordered from the highest quality to the lowest
+    """
+    items = get_item_registry()
     result: dict[int, list[GachaDrop]] = {}
-    table = get_table("LotteryDrop") if use_cn else get_table_global("LotteryDrop")
-    for drop_id, v in table.items():
+    for drop_id, v in get_dual_table("LotteryDrop").get(use_cn).items():
         gacha_id = v['GroupId']
         if gacha_id not in result:
             result[gacha_id] = []
@@ -126,15 +131,36 @@ def parse_gacha_drops(use_cn: bool = False) -> dict[int, list[GachaDrop]]:
             continue
         quantity = drop['ItemAmount']
         result[gacha_id].append(GachaDrop(item, quantity))
+    for drops in result.values():
+        drops.sort(key=lambda x: x.item.quality, reverse=True)
     return result
 
 
+@dataclass
+class GachaData:
+    drops: dict[int, list[GachaDrop]]
+    # (gacha group id, quality, item class) to items in drop order
+    items_by_quality_and_type: dict[tuple[int, int, type], list[Item]]
+
+    def get_items(self, group_id: int, quality: int, item_type: type) -> list[Item]:
+        return self.items_by_quality_and_type.get((group_id, quality, item_type), [])
+
+
+@cache
+def get_gacha_data(use_cn: bool = False) -> GachaData:
+    drops = parse_gacha_drops(use_cn)
+    index: dict[tuple[int, int, type], list[Item]] = {}
+    for group_id, group_drops in drops.items():
+        for drop in group_drops:
+            index.setdefault((group_id, drop.item.quality, type(drop.item)), []).append(drop.item)
+    return GachaData(drops, index)
+
+
 def save_gacha_drop_json(use_cn: bool = False):
-    all_drops = parse_gacha_drops(use_cn)
+    all_drops = get_gacha_data(use_cn).drops
     result = {}
-    for group_id in all_drops:
-        result[group_id] = [d.to_dict() for d in
-                            sorted(all_drops[group_id], key=lambda x: x.item.quality, reverse=True)]
+    for group_id, drops in all_drops.items():
+        result[group_id] = [d.to_dict() for d in drops]
     page_name = "Module:Gacha/drops_cn.json" if use_cn else "Module:Gacha/drops.json"
     save_json_page(page_name, result)
 
@@ -1,16 +1,17 @@
 import dataclasses
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from itertools import takewhile
 from pathlib import Path
 
-from pywikibot import Page
-
 from global_config import char_id_mapper
 from utils.asset_utils import csv_root
 from utils.general_utils import make_tab_group
 from utils.json_utils import load_json, get_game_json, get_game_json_cn
-from utils.lang import Language, get_language, ENGLISH
-from utils.wiki_utils import s
+from utils.lang import Language, get_language, ENGLISH, available_languages
+from utils.wiki_utils import save_pages
 
 group_counter = 1
 num = -1
@@ -193,16 +194,16 @@ def process_file(p: Path, lang: Language) -> str:
 ka_phone_root = csv_root.joinpath("KaPhone")
 
 
-def strinova_comms_main():
-    # TODO: KaChatOption.json has character favorability boosts
-    lang = get_language()
-    name_mapper = {
-        'Huixing': 'Celestia'
-    }
-    skip = {
-        "Fuchsia"
-    }
+name_mapper = {
+    'Huixing': 'Celestia'
+}
+skip = {
+    "Fuchsia"
+}
+
 
+def get_conversation_dirs() -> list[tuple[Path, str]]:
+    result = []
     for parent in ka_phone_root.iterdir():
         if parent.is_file():
             continue
@@ -210,34 +211,68 @@ def strinova_comms_main():
         conversation_name = name_mapper.get(conversation_name, conversation_name)
         if conversation_name not in char_id_mapper.values() or conversation_name in skip:
             continue
-        # tab name, tab content, and sort weight; smaller is more important
-        x: list[tuple[str, str, int]] = []
-        for file in parent.glob("*.json"):
-            name = file.name.capitalize()
-            tab = "?"
-            last_segment = re.search(r"\d+$", name.split("_")[-1].split(".")[0]).group(0)
-            if name.startswith(conversation_name) or name.startswith(parent.name.capitalize()):
-                tab = ("Friendship Lv. " + last_segment, 0 + int(last_segment))
-            elif name.lower().startswith("playerbirthday"):
-                tab = ("Player birthday " + last_segment, 20 + int(last_segment))
-            elif name.lower().startswith("birthday"):
-                tab = (f"{conversation_name} birthday " + last_segment, 10 + int(last_segment))
-            processed = process_file(file, lang)
-            if processed != "":
-                x.append((tab[0], processed, tab[1]))
-        group_string = f" group=strinova_comms_{make_tab_group(conversation_name)} | "
-        tabs, contents = zip(*[(t[0], t[1]) for t in sorted(x, key=lambda t: t[2])])
-        result = "<noinclude>{{StrinovaCommsTop}}</noinclude>" + \
-                 "{{Tab/tabs| " + group_string + " | ".join(tabs) + " }}\n" + \
-                 "{{Tab/content| " + group_string + "\n\n" + "\n\n|\n\n".join(contents) + "\n\n}}" + \
-                 "<noinclude>[[Category:Strinova Comms]]</noinclude>"
-
-        p = Page(s, conversation_name + "/Strinova Comms" + lang.page_suffix)
-        if p.text.strip() != result:
-            p.text = result
-            p.save(summary="generate strinova comms")
-        global group_counter
-        group_counter = 1
+        result.append((parent, conversation_name))
+    return result
+
+
+def make_conversation_page(parent: Path, conversation_name: str, lang: Language) -> tuple[str, str]:
+    """
+    Render every conversation of a character into a single page. Runs in worker processes, so it
+    only depends on its arguments and the per-process json cache.
+    :return: page title and page text
+    """
+    global group_counter
+    group_counter = 1
+    # tab name, tab content, and sort weight; smaller is more important
+    x: list[tuple[str, str, int]] = []
+    for file in parent.glob("*.json"):
+        name = file.name.capitalize()
+        tab = "?"
+        last_segment = re.search(r"\d+$", name.split("_")[-1].split(".")[0]).group(0)
+        if name.startswith(conversation_name) or name.startswith(parent.name.capitalize()):
+            tab = ("Friendship Lv. " + last_segment, 0 + int(last_segment))
+        elif name.lower().startswith("playerbirthday"):
+            tab = ("Player birthday " + last_segment, 20 + int(last_segment))
+        elif name.lower().startswith("birthday"):
+            tab = (f"{conversation_name} birthday " + last_segment, 10 + int(last_segment))
+        processed = process_file(file, lang)
+        if processed != "":
+            x.append((tab[0], processed, tab[1]))
+    group_string = f" group=strinova_comms_{make_tab_group(conversation_name)} | "
+    tabs, contents = zip(*[(t[0], t[1]) for t in sorted(x, key=lambda t: t[2])])
+    result = "<noinclude>{{StrinovaCommsTop}}</noinclude>" + \
+             "{{Tab/tabs| " + group_string + " | ".join(tabs) + " }}\n" + \
+             "{{Tab/content| " + group_string + "\n\n" + "\n\n|\n\n".join(contents) + "\n\n}}" + \
+             "<noinclude>[[Category:Strinova Comms]]</noinclude>"
+    return conversation_name + "/Strinova Comms" + lang.page_suffix, result
+
+
+def strinova_comms_main(languages: list[Language] | None = None, workers: int | None = None):
+    """
+    Generate Strinova Comms pages for every character in every given language. Pages are rendered
+    in worker processes and saved together once rendering is done.
+    :param languages: defaults to the current language
+    :param workers: number of worker processes; defaults to the number of CPUs
+    """
+    # TODO: KaChatOption.json has character favorability boosts
+    if languages is None:
+        languages = [get_language()]
+    conversation_dirs = get_conversation_dirs()
+    jobs = [(parent, conversation_name, lang)
+            for lang in languages
+            for parent, conversation_name in conversation_dirs]
+    # Jobs are grouped by language and handed out in contiguous chunks, so each worker only loads
+    # the Game.json of one or two languages.
+    chunksize = max(1, len(jobs) // (workers or os.cpu_count() or 1))
+    # This may run on a JobRunner thread alongside other tasks; forking a multithreaded process can
+    # leave locks held in the children, so workers are spawned.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        texts = dict(executor.map(make_conversation_page, *zip(*jobs), chunksize=chunksize))
+    save_pages(texts, summary="generate strinova comms")
+
+
+def strinova_comms_all_languages():
+    strinova_comms_main(available_languages)
 
 
 def event_strinova_comms():
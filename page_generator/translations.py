@@ -1,7 +1,9 @@
+import hashlib
 import json
 import re
 from copy import deepcopy
-from functools import cache
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
 from pywikibot import Page
 
@@ -10,8 +12,10 @@ from global_config import char_id_mapper, internal_names
 from page_generator.maps import parse_maps
 from page_generator.weapons import parse_weapons
 from utils.general_utils import camp_id_to_string
+from utils.asset_utils import csv_root, global_csv_root
+from utils.cache_utils import load_pickle_cache, save_pickle_cache, locked_cache
 from utils.dict_utils import merge_dict
-from utils.json_utils import get_all_game_json
+from utils.json_utils import get_all_game_json, table_fingerprint
 from utils.lang import Language, ENGLISH
 from utils.lang_utils import get_multilanguage_dict, char_name_table, StringConverters, compose
 from utils.wiki_utils import s, save_json_page
@@ -33,9 +37,10 @@ def handle_translation_alt(d: dict[str, dict[str, str]], original_key: str, alt_
     d[alt_key][ENGLISH.code] = alt_key
 
 
-@cache
-def get_translations() -> dict[str, dict[str, str]]:
-    ui_global = get_all_game_json("ST_UIGlobal")
+TRANSLATIONS_VERSION = 1
+
+
+def translate_characters() -> dict[str, dict[str, str]]:
     result: dict[str, dict[str, str]] = {}
     i18n_1 = get_all_game_json("ST_RoleName")
     i18n_2 = get_all_game_json("Goods")
@@ -56,15 +61,22 @@ def get_translations() -> dict[str, dict[str, str]]:
     for lang, overrides in char_name_table.items():
         for char_id, localized_name in overrides.items():
             result[char_id_mapper[char_id]][lang] = localized_name
+    return result
 
-    # faction names
+
+def translate_factions() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
     i18n = get_all_game_json("RoleTeam")
     for camp_id, camp_name in camp_id_to_string.items():
         if camp_id == 0:
             result[camp_name] = get_multilanguage_dict(get_all_game_json("FunctionUnlock"), f"119_Name", default=camp_name)
         else:
             result[camp_name] = get_multilanguage_dict(i18n, f"{camp_id}_NameCn", default=camp_name)
+    return result
+
 
+def translate_weapons() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
     i18n = get_all_game_json("ST_UIRoomCustomRoomRule")
     d = get_multilanguage_dict(i18n, "Weapon")
     result["Weapon"] = d
@@ -74,18 +86,24 @@ def get_translations() -> dict[str, dict[str, str]]:
     for w in weapons.values():
         if w.parent is None:
             result[w.name_en] = w.name
+    return result
+
+
+def translate_maps() -> dict[str, dict[str, str]]:
+    return dict((m.name_en, m.name) for m in parse_maps().values())
 
-    # maps
-    maps = parse_maps().values()
-    for m in maps:
-        result[m.name_en] = m.name
 
-    # game modes
+def translate_game_modes() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
     i18n = get_all_game_json("PlayerSeasonData")
     for i in range(1, 6):
         d = get_multilanguage_dict(i18n, f"{i}_Name", converter=StringConverters.all_caps_remove)
         result[d[ENGLISH.code]] = d
+    return result
 
+
+def translate_item_types() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
     # skills
     i18n = get_all_game_json("ST_Common")
     for i in [1, 2, 3, 6]:
@@ -98,7 +116,11 @@ def get_translations() -> dict[str, dict[str, str]]:
         english_key = d[ENGLISH.code]
         result[english_key] = d
         handle_translation_alt(result, english_key, alt_name)
+    return result
+
 
+def translate_string_energy_network() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
     # string energy network upgrades
     i18n = merge_dict(get_all_game_json("ST_GrowthDefine"), get_all_game_json("ST_InGame"))
     attributes = list(parse_string_energy_network_stats().values())[0].keys()
@@ -112,6 +134,12 @@ def get_translations() -> dict[str, dict[str, str]]:
                                                   converter=replace_placeholders)
     ui_bomb = get_all_game_json("ST_UIBomb")
     result["String Energy Network"] = get_multilanguage_dict(ui_bomb, "StringEnergyAmplification")
+    return result
+
+
+def translate_ui() -> dict[str, dict[str, str]]:
+    result: dict[str, dict[str, str]] = {}
+    ui_global = get_all_game_json("ST_UIGlobal")
 
     # Damage locations
     i18n = get_all_game_json("ST_UINonResidentFunctionsBattleData")
@@ -157,7 +185,88 @@ def get_translations() -> dict[str, dict[str, str]]:
     result["Strinova"] = get_multilanguage_dict(i18n, "Strinova")
 
     result["Damage"] = get_multilanguage_dict(ui_global, "Damage")
+    return result
+
+
+@dataclass
+class TranslationSection:
+    name: str
+    build: Callable[[], dict[str, dict[str, str]]]
+    # Game.json namespaces read by build (see get_all_game_json)
+    namespaces: list[str]
+    # CN and GL tables read by build (see get_table and get_table_global)
+    tables: list[str] = field(default_factory=list)
+    global_tables: list[str] = field(default_factory=list)
+    # constants in code that build depends on
+    constants: list[Any] = field(default_factory=list)
+
+    def input_hash(self) -> str:
+        h = hashlib.sha1()
+        for namespace in self.namespaces:
+            h.update(namespace.encode("utf-8"))
+            h.update(json.dumps(get_all_game_json(namespace), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        for path in ([csv_root / f"{t}.json" for t in self.tables] +
+                     [global_csv_root / f"{t}.json" for t in self.global_tables]):
+            h.update(path.read_bytes())
+        for constant in self.constants:
+            h.update(repr(constant).encode("utf-8"))
+        return h.hexdigest()
+
+
+# sections are merged in this order, so later sections win on conflicting keys
+translation_sections: list[TranslationSection] = [
+    TranslationSection("characters", translate_characters, ["ST_RoleName", "Goods"],
+                       constants=[char_id_mapper, internal_names, char_name_table]),
+    TranslationSection("factions", translate_factions, ["RoleTeam", "FunctionUnlock"],
+                       constants=[camp_id_to_string]),
+    TranslationSection("weapons", translate_weapons, ["ST_UIRoomCustomRoomRule", "Weapon", "Goods", "ST_ModuleName"],
+                       tables=["Weapon"], global_tables=["Role"], constants=[char_id_mapper]),
+    TranslationSection("maps", translate_maps, ["ST_MapCfg"], global_tables=["MapCfg"]),
+    TranslationSection("game_modes", translate_game_modes, ["PlayerSeasonData"]),
+    TranslationSection("item_types", translate_item_types, ["ST_Common"]),
+    TranslationSection("string_energy_network", translate_string_energy_network,
+                       ["ST_GrowthDefine", "ST_InGame", "ST_UIBomb"], global_tables=["Growth_Bomb"]),
+    TranslationSection("ui", translate_ui,
+                       ["ST_UIGlobal", "ST_UINonResidentFunctionsBattleData", "", "ST_UIApartmentInformation",
+                        "FunctionUnlock", "ST_Lottery", "ST_UIBattlePass", "ST_UILottery", "ST_UIChat"]),
+]
+
+
+def build_translations() -> dict[str, dict[str, str]]:
+    """
+    Rebuild the sections whose inputs changed since the last build and reuse the others.
+    """
+    cached: dict[str, tuple[str, dict]] = load_pickle_cache("translation_sections", str(TRANSLATIONS_VERSION)) or {}
+    sections: dict[str, tuple[str, dict]] = {}
+    for section in translation_sections:
+        input_hash = section.input_hash()
+        if section.name in cached and cached[section.name][0] == input_hash:
+            sections[section.name] = cached[section.name]
+        else:
+            print(f"Rebuilding translations of {section.name}")
+            sections[section.name] = (input_hash, section.build())
+    save_pickle_cache("translation_sections", str(TRANSLATIONS_VERSION), sections)
+    result: dict[str, dict[str, str]] = {}
+    for section in translation_sections:
+        result.update(sections[section.name][1])
+    return result
 
+
+@locked_cache
+def get_translations() -> dict[str, dict[str, str]]:
+    """
+    Translations of common terms, keyed by English term and then by language code. The table is
+    cached on disk and only rebuilt when the game data it was built from changes.
+    """
+    tables = set(t for section in translation_sections for t in section.tables)
+    global_tables = set(t for section in translation_sections for t in section.global_tables)
+    constants = repr([section.constants for section in translation_sections])
+    key = table_fingerprint(tables=sorted(tables), global_tables=sorted(global_tables), version=TRANSLATIONS_VERSION)
+    key += hashlib.sha1(constants.encode("utf-8")).hexdigest()
+    result = load_pickle_cache("translations", key)
+    if result is None:
+        result = build_translations()
+        save_pickle_cache("translations", key, result)
     return result
 
 
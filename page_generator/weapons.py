@@ -6,7 +6,7 @@ from pywikibot import FilePage
 from pywikibot.pagegenerators import PreloadingGenerator
 
 from global_config import char_id_mapper
-from utils.asset_utils import global_resources_root
+from utils.asset_index import resolve_asset
 from utils.general_utils import get_char_id_to_weapon_id, split_dict, split_and_save_dict
 from utils.json_utils import get_all_game_json, get_table
 from utils.lang import CHINESE, ENGLISH
@@ -254,8 +254,8 @@ def upload_weapon_white_icons():
     weapons = [w for w in get_weapons_by_type() if w.parent is None]
     req = []
     for w in weapons:
-        source = global_resources_root / "Weapon" / "WeaponIconWhite" / f"T_Dynamic_WeaponWhite_{w.id}.png"
-        if not source.exists():
+        source = resolve_asset("weapon_white", w.id)
+        if source is None:
             print(w.name_en)
             continue
         target = f"{w.name_en} icon white.png"
@@ -1,46 +1,106 @@
-import filecmp
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 
 from pywikibot import Site, FilePage
-from pywikibot.pagegenerators import PreloadingGenerator
 
 from char_info.gallery import parse_skin_tables
-from utils.file_utils import temp_file_dir
-from utils.general_utils import download_file
-from utils.wiki_utils import bwiki
+from utils.download_utils import download
+from utils.file_utils import local_file_dir, temp_file_dir
+from utils.image_utils import hamming_distance, image_hashes
+from utils.wiki_utils import ImageInfo, bwiki, get_image_info
 
+# pHash distance up to which two images are considered the same picture encoded differently
+REENCODE_THRESHOLD = 10
+compare_dir = temp_file_dir / "gallery_compare"
+report_path = local_file_dir / "gallery_compare.txt"
 
-def main():
+
+@dataclass
+class ComparePair:
+    skin_id: int
+    bwiki_title: str
+    title: str
+
+
+@dataclass
+class CompareResult:
+    pair: ComparePair
+    ahash_distance: int
+    phash_distance: int
+
+    @property
+    def is_reencode(self) -> bool:
+        return self.phash_distance <= REENCODE_THRESHOLD
+
+
+def get_compare_pairs() -> list[ComparePair]:
     skins = parse_skin_tables()
-    bwiki_pages: dict[int, FilePage] = {}
-    pages: dict[int, FilePage] = {}
+    pairs: list[ComparePair] = []
     for char, skin_list in skins.items():
         for skin in skin_list:
-            skin_id = skin.id
-            bwiki_title = skin.get_bwiki_portrait_title(char)
-            bwiki_page = FilePage(bwiki(), bwiki_title)
-            title = skin.get_mh_portrait_title(char)
-            page = FilePage(Site(), title)
-            bwiki_pages[skin_id] = bwiki_page
-            pages[skin_id] = page
-    gen = PreloadingGenerator(bwiki_pages.values())
-    for _ in gen:
-        pass
-    gen = PreloadingGenerator(pages.values())
-    for _ in gen:
-        pass
-    f1 = temp_file_dir / "gallery_file_1.png"
-    f2 = temp_file_dir / "gallery_file_2.png"
-    for skin_id in pages.keys():
-        p1 = bwiki_pages[skin_id]
-        p2 = pages[skin_id]
-        if not p1.exists() or not p2.exists():
-            continue
-        download_file(p1.get_file_url(), f1)
-        download_file(p2.get_file_url(), f2)
-        identical = filecmp.cmp(f1, f2, shallow=False)
-        filecmp.clear_cache()
-        if not identical:
-            print(f"Double check {p2.full_url()}")
+            bwiki_title = FilePage(bwiki(), skin.get_bwiki_portrait_title(char)).title(with_ns=True)
+            title = FilePage(Site(), skin.get_mh_portrait_title(char)).title(with_ns=True)
+            pairs.append(ComparePair(skin.id, bwiki_title, title))
+    return pairs
+
+
+def fetch_image(info: ImageInfo) -> Path:
+    path = compare_dir / f"{info.sha1}.{info.url.split('.')[-1]}"
+    if not path.exists():
+        download(info.url, path, sha1=info.sha1, use_cache=True)
+    return path
+
+
+def compare_images(info1: ImageInfo, info2: ImageInfo) -> tuple[int, int]:
+    """
+    :return: aHash and pHash distances between two images
+    """
+    ahash1, phash1 = image_hashes(fetch_image(info1))
+    ahash2, phash2 = image_hashes(fetch_image(info2))
+    return hamming_distance(ahash1, ahash2), hamming_distance(phash1, phash2)
+
+
+def compare_gallery(pairs: list[ComparePair], workers: int = 8) -> tuple[int, list[CompareResult]]:
+    """
+    Compare bwiki and wiki copies of images. Files with the same SHA-1 are identical and are not
+    downloaded; the others are downloaded concurrently and compared by perceptual hashes.
+    :return: number of identical pairs and the results of the pairs that differ
+    """
+    bwiki_infos = get_image_info((p.bwiki_title for p in pairs), bwiki())
+    infos = get_image_info((p.title for p in pairs), Site())
+    pairs = [p for p in pairs if p.bwiki_title in bwiki_infos and p.title in infos]
+    different = [p for p in pairs if bwiki_infos[p.bwiki_title].sha1 != infos[p.title].sha1]
+    compare_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        distances = executor.map(lambda p: compare_images(bwiki_infos[p.bwiki_title], infos[p.title]), different)
+        results = [CompareResult(p, *d) for p, d in zip(different, distances)]
+    return len(pairs) - len(different), results
+
+
+def write_report(identical: int, results: list[CompareResult]) -> None:
+    changed = [r for r in results if not r.is_reencode]
+    reencoded = [r for r in results if r.is_reencode]
+    lines = [f"Identical: {identical}",
+             f"Re-encoded: {len(reencoded)}",
+             f"Changed: {len(changed)}",
+             "",
+             "== Changed =="]
+    lines.extend(f"{r.pair.title} <- {r.pair.bwiki_title} (aHash {r.ahash_distance}, pHash {r.phash_distance})"
+                 for r in changed)
+    lines.extend(["", "== Re-encoded =="])
+    lines.extend(f"{r.pair.title} <- {r.pair.bwiki_title} (aHash {r.ahash_distance}, pHash {r.phash_distance})"
+                 for r in reencoded)
+    report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main():
+    identical, results = compare_gallery(get_compare_pairs())
+    for r in results:
+        if not r.is_reencode:
+            print(f"Double check {FilePage(Site(), r.pair.title).full_url()}")
+    write_report(identical, results)
+    print(f"Report written to {report_path}")
 
 
 if __name__ == "__main__":
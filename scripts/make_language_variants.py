@@ -2,14 +2,16 @@ from dataclasses import dataclass
 
 from pywikibot import Page
 from pywikibot.data.api import Request, PropertyGenerator
+from pywikibot.exceptions import PageCreatedConflictError
 from pywikibot.pagegenerators import GeneratorFactory, PreloadingGenerator
 
-from global_config import char_id_mapper
+from global_config import char_id_mapper, get_characters
 from page_generator.translations import get_translations, translate
 
-from utils.general_utils import get_char_pages
+from utils.general_utils import fetch_char_pages
 from utils.lang import Language, LanguageVariants, ENGLISH, JAPANESE, get_language
 from utils.lang_utils import title_to_lang, from_lang_code
+from utils.page_cache import page_info_cache
 from utils.wiki_utils import s
 
 
@@ -33,9 +35,16 @@ def get_localized_char_name(char_id: int, lang: Language = get_language()) -> st
 
 
 def copy_page(original: Page, target: Page, lang: Language, localized_title: str | None = None):
-    if not target.exists():
+    cache = page_info_cache(s)
+    if len(cache.confirm_missing([target])) > 0:
         target.text = original.text
-        target.save(f"new {lang.name} page")
+        try:
+            target.save(f"new {lang.name} page", createonly=True)
+        except PageCreatedConflictError:
+            print(f"{target.title()} was created by someone else in the meantime. Skipping.")
+            cache.invalidate(target)
+            return
+        cache.invalidate(target)
         try:
             r = Request(s, parameters={"action": "setpagelanguage", "title": target.title(), "lang": lang.mw_code,
                                        "token": getattr(s, 'tokens')['csrf']})
@@ -45,8 +54,10 @@ def copy_page(original: Page, target: Page, lang: Language, localized_title: str
         if localized_title is not None and localized_title.strip() != "":
             try:
                 redirect = Page(s, localized_title)
-                if not redirect.exists():
-                    redirect.set_redirect_target(target, create=True, summary=f"redirect {lang.code} title")
+                if len(cache.confirm_missing([redirect])) > 0:
+                    redirect.set_redirect_target(target, create=True, summary=f"redirect {lang.code} title",
+                                                 createonly=True)
+                    cache.invalidate(redirect)
             except Exception as e:
                 print(e)
 
@@ -55,13 +66,19 @@ def make_char_pages():
     languages = [l.value
                  for l in LanguageVariants
                  if l.value not in [ENGLISH]]
+    subpages = ['', '/gallery']
+    char_pages = fetch_char_pages(subpages, [ENGLISH] + languages)
+    characters = get_characters()
     for lang in languages:
         print(f"Current language: {lang.code}")
-        for subpage in ['', '/gallery']:
-            english_version = dict((char_id, p) for char_id, _, p in get_char_pages(subpage_name=subpage))
-            for char_id, char_name, p in get_char_pages(subpage_name=subpage, lang=lang):
-                page_en = english_version[char_id]
-                copy_page(page_en, p, lang, translate(page_en.title(), lang))
+        for subpage in subpages:
+            localized_titles = dict((c.id, translate(char_pages[(c.id, subpage, ENGLISH.code)].title(), lang))
+                                    for c in characters)
+            page_info_cache(s).prefetch([char_pages[(c.id, subpage, lang.code)] for c in characters] +
+                                        [t for t in localized_titles.values() if t is not None and t.strip() != ""])
+            for c in characters:
+                page_en = char_pages[(c.id, subpage, ENGLISH.code)]
+                copy_page(page_en, char_pages[(c.id, subpage, lang.code)], lang, localized_titles[c.id])
 
 
 def copy_lang_pages():
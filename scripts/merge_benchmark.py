@@ -0,0 +1,32 @@
+import time
+
+from utils.dict_utils import merge_dict2, merge_i18n
+from utils.json_utils import get_all_game_json
+
+
+def benchmark_merge_i18n(rounds: int = 10):
+    item = get_all_game_json("Item")
+    goods = get_all_game_json("Goods")
+    keys = sum(len(t) for t in item.values()) + sum(len(t) for t in goods.values())
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        expected = merge_dict2(item, goods)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"merge_dict2: {keys} keys in {elapsed * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = merge_i18n(item, goods)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"merge_i18n: {keys} keys in {elapsed * 1000:.1f}ms")
+
+    assert result == expected
+
+
+def main():
+    benchmark_merge_i18n()
+
+
+if __name__ == '__main__':
+    main()
@@ -97,7 +97,7 @@ def main():
                 comment="Batch upload MMD model"
             ))
     # FIXME: perform uploads after script is finalized
-    process_uploads(uploads, force=False)
+    process_uploads(uploads, force=False, job="mmd_models")
     save_mmd_json_object(result)
     print(result)
 
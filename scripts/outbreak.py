@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
+from utils.asset_index import asset_exists
 from utils.asset_utils import resource_root
 from utils.json_utils import get_all_game_json, get_table, get_table_global
 from utils.lang import ENGLISH, CHINESE
@@ -160,7 +161,7 @@ def outbreak_upgrades() -> dict[int, OutbreakUpgrade]:
         image_path = resource_root / "RoguelikeCard" / image_path
 
         # If no image, probably unreleased
-        if not image_path.exists():
+        if not asset_exists(image_path):
             continue
 
         result[card_id] = OutbreakUpgrade(
@@ -0,0 +1,23 @@
+from utils.json_utils import get_dual_table
+
+tables = ["Achievement", "Decal", "IdCard", "Lottery", "LotteryDrop", "BattlePassPrize"]
+
+
+def print_region_diff(table_names: list[str]):
+    for name in table_names:
+        diff = get_dual_table(name).diff()
+        if not diff:
+            print(f"{name}: identical")
+            continue
+        print(f"{name}: {len(diff.added)} only in CN, {len(diff.removed)} only in GL, {len(diff.changed)} changed")
+        for label, ids in [("Only in CN", diff.added), ("Only in GL", diff.removed), ("Changed", diff.changed)]:
+            if len(ids) > 0:
+                print(f"  {label}: {', '.join(str(i) for i in ids)}")
+
+
+def main():
+    print_region_diff(tables)
+
+
+if __name__ == '__main__':
+    main()
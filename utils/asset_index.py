@@ -0,0 +1,126 @@
+import os
+from functools import cached_property
+from pathlib import Path
+
+from utils.asset_utils import resource_root, global_resources_root
+from utils.cache_utils import load_pickle_cache, save_pickle_cache, locked_cache
+
+ASSET_INDEX_VERSION = 1
+
+# file name patterns of assets under DynamicResource, tried in order, and the roots to look in
+asset_patterns: dict[str, tuple[list[str], tuple[Path, ...]]] = {
+    # big version if it exists, otherwise small version, otherwise the shop image
+    "item_icon": (["Item/BigIcon/T_Dynamic_BigItem_{}.png",
+                   "Item/ItemIcon/T_Dynamic_Item_{}.png",
+                   "Store/T_Dynamic_ItemStore_Big_{}.png"], (resource_root, global_resources_root)),
+    "achievement": (["Achievement/T_Dynamic_Achievement_{}.png"], (resource_root,)),
+    "decal": (["Decal/PaintingListDecal/T_Dynamic_Decal_{}.png"], (resource_root, global_resources_root)),
+    "chat_bubble": (["ChatBubbles/ChatBubblesIcon/T_Dynamic_ChatBubblesIcon_{}.png"], (global_resources_root,)),
+    "weapon_white": (["Weapon/WeaponIconWhite/T_Dynamic_WeaponWhite_{}.png"], (global_resources_root,)),
+    "weapon_growth": (["Weapon/InGameGrowth/T_Dynamic_InGameGrowth_{}.png"], (global_resources_root,)),
+}
+
+
+# file names on Windows are case-insensitive
+case_insensitive_files = os.name == "nt"
+
+
+class AssetIndex:
+    """
+    All files under a resource root, so that existence checks do not need a stat call each.
+    """
+
+    def __init__(self, root: Path, files: set[str], dir_mtimes: dict[str, int]):
+        self.root = root
+        self.files = files
+        self.dir_mtimes = dir_mtimes
+
+    @staticmethod
+    def scan(root: Path) -> "AssetIndex":
+        files: set[str] = set()
+        dir_mtimes: dict[str, int] = {}
+        stack = [""]
+        while len(stack) > 0:
+            rel_dir = stack.pop()
+            directory = root / rel_dir
+            dir_mtimes[rel_dir] = directory.stat().st_mtime_ns
+            with os.scandir(directory) as it:
+                for entry in it:
+                    rel = entry.name if rel_dir == "" else f"{rel_dir}/{entry.name}"
+                    if entry.is_dir():
+                        stack.append(rel)
+                    else:
+                        files.add(rel)
+        return AssetIndex(root, files, dir_mtimes)
+
+    def is_current(self) -> bool:
+        """
+        Whether no file was added or removed since the scan. Only directories need to be checked
+        because adding or removing a file changes the modification time of its directory.
+        """
+        for rel_dir, mtime in self.dir_mtimes.items():
+            try:
+                if (self.root / rel_dir).stat().st_mtime_ns != mtime:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    @cached_property
+    def lower_files(self) -> set[str]:
+        return set(rel.lower() for rel in self.files)
+
+    def __contains__(self, rel: str) -> bool:
+        if rel in self.files:
+            return True
+        # asset names built from game data do not always match the case of the file on disk
+        return case_insensitive_files and rel.lower() in self.lower_files
+
+
+@locked_cache
+def get_asset_index(root: Path) -> AssetIndex:
+    cache_name = f"asset_index_{root.parent.name}"
+    key = f"{root}|{ASSET_INDEX_VERSION}"
+    index: AssetIndex | None = load_pickle_cache(cache_name, key)
+    if index is None or not index.is_current():
+        index = AssetIndex.scan(root)
+        save_pickle_cache(cache_name, key, index)
+    return index
+
+
+def asset_exists(path: Path) -> bool:
+    """
+    Path.exists() backed by the index for files under resource_root or global_resources_root.
+    """
+    for root in (resource_root, global_resources_root):
+        if path.is_relative_to(root):
+            return path.relative_to(root).as_posix() in get_asset_index(root)
+    return path.exists()
+
+
+def resolve_resource(rel: str, roots: tuple[Path, ...] = (resource_root, global_resources_root)) -> Path | None:
+    """
+    :param rel: path relative to a resource root, using forward slashes
+    :param roots: roots to look in, in order of preference
+    :return: the first existing file, or None
+    """
+    for root in roots:
+        if rel in get_asset_index(root):
+            return root / rel
+    return None
+
+
+def resolve_asset(kind: str, asset_id: int | str) -> Path | None:
+    """
+    Find the local file of an asset by one of the naming conventions in asset_patterns.
+    """
+    patterns, roots = asset_patterns[kind]
+    for pattern in patterns:
+        path = resolve_resource(pattern.format(asset_id), roots)
+        if path is not None:
+            return path
+    return None
+
+
+def resolve_item_icon(item_id: int | str) -> Path | None:
+    return resolve_asset("item_icon", item_id)
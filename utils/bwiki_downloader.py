@@ -1,11 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from pywikibot import Site, FilePage
 from pywikibot.pagegenerators import GeneratorFactory
 from pywikibot.site._upload import Uploader
 
+from utils.dedup_utils import hash_files
+from utils.download_utils import download_resumable
 from utils.file_utils import local_file_dir
-from utils.general_utils import download_file, cn_name_to_en
+from utils.general_utils import cn_name_to_en
+from utils.page_cache import page_info_cache
+from utils.wiki_utils import ImageInfo, get_image_info
 
 bwiki = Site(code="bwiki")
 s = Site()
@@ -14,34 +19,77 @@ s = Site()
 def default():
     gen = GeneratorFactory(bwiki)
     gen.handle_args(["-cat:角色"])
-    gen = gen.getCombinedGenerator(preload=False)
-    for page in gen:
+    pages = list(gen.getCombinedGenerator(preload=False))
+    cache = page_info_cache(bwiki)
+    cache.prefetch(f'File:{page.title()}-初始立绘.png' for page in pages)
+    for page in pages:
         title = page.title()
         file_page = FilePage(bwiki, f'File:{title}-初始立绘.png')
-        if not file_page.exists():
+        if not cache.exists(file_page):
             print(f"{file_page.title()} does not exist")
             continue
         url = file_page.get_file_url()
         title = cn_name_to_en(title)
         target_page = FilePage(s, f'File:{title} Default.png')
         Uploader(s, target_page, source_url=url, comment="upload from bwiki", ignore_warnings=True).upload()
+        page_info_cache(s).invalidate(target_page)
 
 
 def profile():
     gen = GeneratorFactory(bwiki)
     gen.handle_args(["-cat:角色"])
-    gen = gen.getCombinedGenerator(preload=False)
-    for page in gen:
+    pages = list(gen.getCombinedGenerator(preload=False))
+    source_cache = page_info_cache(bwiki)
+    target_cache = page_info_cache(s)
+    source_cache.prefetch(f'File:{page.title()}头像.png' for page in pages)
+    target_cache.prefetch(f'File:{cn_name_to_en(page.title())} Profile.png' for page in pages)
+    for page in pages:
         title = page.title()
         file_page = FilePage(bwiki, f'File:{title}头像.png')
-        if not file_page.exists():
+        if not source_cache.exists(file_page):
             print(f"{file_page.title()} does not exist")
             continue
         url = file_page.get_file_url()
         title = cn_name_to_en(title)
         target_page = FilePage(s, f'File:{title} Profile.png')
-        if not target_page.exists():
+        if not target_cache.exists(target_page):
             s.upload(target_page, source_url=url, comment="upload from bwiki")
+            target_cache.invalidate(target_page)
+
+
+def mirror_files(files: dict[str, Path], site: Site = bwiki, workers: int = 8):
+    """
+    Download files from a wiki concurrently. Files whose local copy already has the right size and
+    SHA-1 are skipped, and interrupted downloads are resumed.
+    :param files: file title (including the namespace) to local path
+    :param site: wiki to download from
+    :param workers: number of concurrent downloads
+    """
+    infos = get_image_info(files.keys(), site)
+    candidates = [path
+                  for title, path in files.items()
+                  if title in infos and path.exists() and path.stat().st_size == infos[title].size]
+    local_hashes = hash_files(candidates)
+    pending: list[tuple[ImageInfo, Path]] = []
+    for title, path in files.items():
+        info = infos.get(title)
+        if info is None:
+            print(f"{title} does not exist")
+            continue
+        if local_hashes.get(path) == info.sha1:
+            continue
+        pending.append((info, path))
+    print(f"Downloading {len(pending)} of {len(files)} files")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = dict((executor.submit(download_resumable, info.url, path, info.size, info.sha1), info)
+                       for info, path in pending)
+        for future in as_completed(futures):
+            title = futures[future].title
+            try:
+                future.result()
+                print(f"{title} downloaded")
+            except Exception as e:
+                print(f"Failed to download {title}: {e}")
 
 
 def download_wallpapers():
@@ -50,17 +98,13 @@ def download_wallpapers():
     gen = GeneratorFactory(bwiki)
     gen.handle_args(["-imagesused:壁纸", "-ns:File"])
     gen = gen.getCombinedGenerator(preload=False)
+    files: dict[str, Path] = {}
     for page in gen:
         file_name = page.title(underscore=True, with_ns=False)
         if file_name in existing:
             continue
-        target_file = wallpaper_dir / file_name
-        # title = page.title(with_ns=True, underscore=True)
-        # file_page = FilePage(bwiki, title)
-        file_page: FilePage = page
-        url = file_page.get_file_url()
-        download_file(url, target_file)
-        print(f"{file_name} downloaded")
+        files[page.title(with_ns=True)] = wallpaper_dir / file_name
+    mirror_files(files)
 
 
 def category_downloader(cat: str, target: str):
@@ -70,13 +114,11 @@ def category_downloader(cat: str, target: str):
     gen = GeneratorFactory(bwiki)
     gen.handle_args([f'-catr:{cat}'])
     gen = gen.getCombinedGenerator(preload=False)
+    files: dict[str, Path] = {}
     for page in gen:
         file_page = FilePage(bwiki, page.title())
-        local_file_name = target_dir / file_page.title(as_filename=True)
-        if local_file_name.exists():
-            continue
-        url = file_page.get_file_url()
-        download_file(url, local_file_name)
+        files[file_page.title(with_ns=True)] = target_dir / file_page.title(as_filename=True)
+    mirror_files(files)
 
 
 def bwiki_downloader_main():
@@ -0,0 +1,74 @@
+import hashlib
+import pickle
+import threading
+from functools import cache, wraps
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from utils.file_utils import atomic_write, cache_dir
+
+
+def fingerprint(paths: Iterable[Path], *extra: str) -> str:
+    """
+    Cheap fingerprint of a set of files based on their sizes and modification times. Missing files
+    are part of the fingerprint as well.
+    :param paths: files to fingerprint
+    :param extra: additional strings (e.g. a version number) mixed into the result
+    """
+    h = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = path.stat()
+            h.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+        except FileNotFoundError:
+            h.update(f"{path}|missing\n".encode("utf-8"))
+    for e in extra:
+        h.update(f"{e}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def get_pickle_cache_path(name: str) -> Path:
+    return cache_dir / f"{name}.pickle"
+
+
+def load_pickle_cache(name: str, key: str) -> Any | None:
+    """
+    Load an object saved by save_pickle_cache.
+    :return: the object, or None if there is no cache or it was saved under a different key
+    """
+    path = get_pickle_cache_path(name)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            cached_key, obj = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable cache {path}: {e}")
+        return None
+    if cached_key != key:
+        return None
+    return obj
+
+
+def save_pickle_cache(name: str, key: str, obj: Any) -> None:
+    try:
+        with atomic_write(get_pickle_cache_path(name), "wb") as f:
+            pickle.dump((key, obj), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        print(f"Could not cache {name}: {e}")
+
+
+def locked_cache[**P, R](f: Callable[P, R]) -> Callable[P, R]:
+    """
+    functools.cache for builders that tasks on different threads may call at the same time. The
+    first call builds the result while the others wait for it, instead of building it again.
+    """
+    cached = cache(f)
+    lock = threading.RLock()
+
+    @wraps(f)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with lock:
+            return cached(*args, **kwargs)
+
+    return wrapper
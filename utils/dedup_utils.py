@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+from pywikibot.data.api import ListGenerator
+
+from utils.cache_utils import load_pickle_cache, save_pickle_cache, locked_cache
+from utils.wiki_utils import s
+
+LOCAL_HASH_CACHE = "local_sha1"
+WIKI_INDEX_CACHE = "wiki_sha1_index"
+WIKI_INDEX_TTL = 7 * 24 * 3600
+
+
+def sha1_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_files(paths: Iterable[Path], workers: int = 8) -> dict[Path, str]:
+    """
+    SHA-1 of local files, computed in parallel. Hashes are cached on disk by path, size and
+    modification time, so files that did not change since the last run are not read again.
+    """
+    paths = list(dict.fromkeys(paths))
+    cached: dict[str, tuple[int, int, str]] = load_pickle_cache(LOCAL_HASH_CACHE, "1") or {}
+    result: dict[Path, str] = {}
+    stale: list[Path] = []
+    for path in paths:
+        stat = path.stat()
+        entry = cached.get(str(path))
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            result[path] = entry[2]
+        else:
+            stale.append(path)
+    if len(stale) == 0:
+        return result
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, digest in zip(stale, executor.map(sha1_file, stale)):
+            stat = path.stat()
+            cached[str(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+            result[path] = digest
+    save_pickle_cache(LOCAL_HASH_CACHE, "1", cached)
+    return result
+
+
+class WikiFileIndex:
+    """
+    Local mirror of the SHA-1 of every file on the wiki, built from list=allimages.
+
+    The first build lists all files. Afterward only files uploaded since the last refresh are
+    fetched; a full rebuild happens once the mirror is older than WIKI_INDEX_TTL, which also drops
+    deleted files. Until then, files that were re-uploaded or deleted may still be listed under their
+    old SHA-1, so hits must be confirmed before acting on them.
+    """
+
+    def __init__(self, site=s):
+        self.site = site
+        self.by_sha1: dict[str, list[str]] = {}
+        self.last_timestamp: str | None = None
+        self.built_at: float = 0
+        self._lock = threading.Lock()
+
+    def _key(self) -> str:
+        return str(self.site)
+
+    def _fetch(self, since: str | None) -> None:
+        parameters = {"aiprop": "sha1|timestamp"}
+        if since is not None:
+            parameters |= {"aisort": "timestamp", "aidir": "newer", "aistart": since}
+        for image in ListGenerator("allimages", site=self.site, parameters=parameters):
+            self.add(image["sha1"], image["title"])
+            if self.last_timestamp is None or image["timestamp"] > self.last_timestamp:
+                self.last_timestamp = image["timestamp"]
+
+    def refresh(self) -> None:
+        if time.time() - self.built_at > WIKI_INDEX_TTL:
+            self.by_sha1 = {}
+            self.last_timestamp = None
+            self.built_at = time.time()
+            self._fetch(None)
+        else:
+            self._fetch(self.last_timestamp)
+        if self.last_timestamp is None:
+            self.last_timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            save_pickle_cache(WIKI_INDEX_CACHE, self._key(),
+                              (self.by_sha1, self.last_timestamp, self.built_at))
+
+    def load(self) -> None:
+        cached = load_pickle_cache(WIKI_INDEX_CACHE, self._key())
+        if cached is not None:
+            self.by_sha1, self.last_timestamp, self.built_at = cached
+
+    def find(self, sha1: str) -> list[str]:
+        return self.by_sha1.get(sha1, [])
+
+    def confirm(self, sha1: str) -> list[str]:
+        """
+        Ask the wiki which files currently have this SHA-1 and correct the index accordingly.
+        """
+        parameters = {"aisha1": sha1, "aiprop": "sha1"}
+        titles = [image["title"] for image in ListGenerator("allimages", site=self.site, parameters=parameters)]
+        with self._lock:
+            if len(titles) > 0:
+                self.by_sha1[sha1] = titles
+            else:
+                self.by_sha1.pop(sha1, None)
+        return titles
+
+    def add(self, sha1: str, title: str) -> None:
+        with self._lock:
+            titles = self.by_sha1.setdefault(sha1, [])
+            if title not in titles:
+                titles.append(title)
+
+
+@locked_cache
+def get_wiki_file_index() -> WikiFileIndex:
+    index = WikiFileIndex()
+    index.load()
+    index.refresh()
+    return index
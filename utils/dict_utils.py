@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 from typing import Callable
 
 from utils.string_utils import pick_string_length
@@ -9,8 +9,11 @@ MergeFunction = Callable[[str | int | None, str | int | None], str | int]
 def merge_dict[K, V](a: dict[K, V], b: dict[K, V], check: bool = False, merge: Callable[[list[str]], str] = None) -> dict[K, V]:
     """
     Use b as the base dict and override with a whenever there's a conflict
+
+    Neither input is modified. Only dicts along the paths that a changes are copied; other nested
+    values are shared with the inputs, so do not modify them in place.
     """
-    result = deepcopy(b)
+    result = copy(b)
     for k, v in a.items():
         if isinstance(v, dict):
             if result.get(k) is None:
@@ -31,9 +34,12 @@ def merge_dict2(a: dict, b: dict, merge: MergeFunction = pick_string_length) ->
     """
     Use b as the base dict and override with a whenever there's a conflict (i.e. prioritize a)
 
+    Neither input is modified. Only dicts along the paths that a changes are copied; other nested
+    values are shared with the inputs, so do not modify them in place.
+
     @:param merge: A function that prefers the first parameter
     """
-    result = deepcopy(b)
+    result = copy(b)
     for k, v in a.items():
         if result.get(k) is None:
             result[k] = v
@@ -48,3 +54,36 @@ def merge_dict2(a: dict, b: dict, merge: MergeFunction = pick_string_length) ->
         elif v is not None:
             raise RuntimeError(f"Unexpected type: {type(v)}")
     return result
+
+
+def merge_flat_dict(a: dict, b: dict, merge: MergeFunction = pick_string_length) -> dict:
+    """
+    Same as merge_dict2, with a fast path for the string values that make up localization tables.
+    """
+    result = copy(b)
+    for k, v in a.items():
+        base = result.get(k)
+        if base is None:
+            result[k] = v
+        elif type(v) is str or isinstance(v, int):
+            result[k] = merge(base, v)
+        elif isinstance(v, dict):
+            result[k] = merge_dict2(v, base, merge)
+        elif v is not None and not isinstance(v, list):
+            raise RuntimeError(f"Unexpected type: {type(v)}")
+    return result
+
+
+def merge_i18n(*trees: dict[str, dict], merge: MergeFunction = pick_string_length) -> dict[str, dict]:
+    """
+    Merge localization tables (language code to key to string, as returned by get_all_game_json).
+    Earlier tables take priority, i.e. merge_i18n(a, b, c) == merge_dict2(a, merge_dict2(b, c)).
+    Every language table of the result is a new dict, so keys can be set on it without changing
+    the inputs.
+    """
+    result: dict[str, dict] = {}
+    for tree in reversed(trees):
+        for lang, table in tree.items():
+            base = result.get(lang)
+            result[lang] = copy(table) if base is None else merge_flat_dict(table, base, merge)
+    return result
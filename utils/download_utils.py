@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.file_utils import cache_dir
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+SESSION_POOL_SIZE = 16
+# content-addressed store: files are named by their SHA-1
+download_cache_dir = cache_dir / "downloads"
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def make_session(pool_size: int = SESSION_POOL_SIZE) -> requests.Session:
+    """
+    A session whose connection pool is large enough for pool_size concurrent downloads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=3)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    The shared keep-alive session for the host of url.
+    """
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        if host not in _sessions:
+            session = make_session()
+            if "miraheze" in host or "wikitide" in host:
+                session.headers['User-Agent'] = 'Bot by User:PetraMagna'
+            _sessions[host] = session
+        return _sessions[host]
+
+
+def get_cached_path(sha1: str) -> Path:
+    return download_cache_dir / sha1[:2] / sha1
+
+
+def download(url: str, target: Path, sha1: str | None = None, use_cache: bool = False,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    Download a file. Data goes to a temporary file next to target, which replaces target only once
+    the download is complete, so target is never left half-written.
+    :param url: file URL
+    :param target: local path
+    :param sha1: expected SHA-1 hex digest, if known. Raises IOError on a mismatch.
+    :param use_cache: look up and store the file in the content-addressed download cache.
+        Only has an effect when sha1 is given.
+    :param chunk_size: bytes read per chunk
+    :return: SHA-1 hex digest of the downloaded content
+    """
+    if use_cache and sha1 is not None:
+        cached = get_cached_path(sha1)
+        if cached.exists():
+            shutil.copyfile(cached, target)
+            return sha1
+    h = hashlib.sha1()
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    temp = Path(temp_name)
+    try:
+        with os.fdopen(fd, "wb") as f, get_session(url).get(url, stream=True, timeout=60) as r:
+            r.raise_for_status()
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                h.update(chunk)
+        digest = h.hexdigest()
+        if sha1 is not None and digest != sha1:
+            raise IOError(f"{url}: SHA-1 mismatch")
+        if use_cache and sha1 is not None:
+            cached = get_cached_path(digest)
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(temp, cached)
+        temp.replace(target)
+    finally:
+        temp.unlink(missing_ok=True)
+    return digest
+
+
+def download_resumable(url: str, target: Path, size: int | None = None, sha1: str | None = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Download a file to target through a .part file next to it. If a .part file is left over from an
+    interrupted download, only the missing bytes are requested with a Range header.
+    :param size: expected size in bytes, if known
+    :param sha1: expected SHA-1 hex digest, if known; the file is hashed while it is written
+    """
+    part = target.with_name(target.name + ".part")
+    offset = part.stat().st_size if part.exists() else 0
+    if size is not None and offset > size:
+        offset = 0
+    h = hashlib.sha1()
+    if offset > 0:
+        with open(part, "rb") as f:
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+    headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+    with get_session(url).get(url, stream=True, headers=headers, timeout=60) as r:
+        # 416 means there is nothing left to download
+        if r.status_code != 416:
+            r.raise_for_status()
+            if r.status_code != 206:
+                # the server ignored the range, so start over
+                h = hashlib.sha1()
+            with open(part, "ab" if r.status_code == 206 else "wb") as f:
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    h.update(chunk)
+    if size is not None and part.stat().st_size != size:
+        raise IOError(f"{url}: expected {size} bytes, got {part.stat().st_size}")
+    if sha1 is not None and h.hexdigest() != sha1:
+        part.unlink()
+        raise IOError(f"{url}: SHA-1 mismatch")
+    part.replace(target)
@@ -1,5 +1,8 @@
 import platform
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import IO, Iterator
 
 local_file_dir = Path("files")
 cache_dir = local_file_dir / "cache"
@@ -11,3 +14,23 @@ temp_download_dir = temp_file_dir / "download"
 
 for d in [local_file_dir, cache_dir, temp_file_dir, temp_download_dir]:
     d.mkdir(parents=True, exist_ok=True)
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w", **kwargs) -> Iterator[IO]:
+    """
+    Write to a temporary file next to path and move it over path once the block completes without
+    an error. Every writer gets a temporary file of its own, so concurrent writers of the same path
+    never see each other's partial files; the last one to finish wins.
+    :param mode: "w" or "wb"
+    :param kwargs: passed to open, e.g. encoding
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    temp = Path(temp_name)
+    try:
+        with open(fd, mode, **kwargs) as f:
+            yield f
+        temp.replace(path)
+    finally:
+        temp.unlink(missing_ok=True)
@@ -1,13 +1,14 @@
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
-import requests
 from pywikibot import Page
 from pywikibot.pagegenerators import PreloadingGenerator
 
 from global_config import name_to_en, char_id_mapper, internal_names, get_characters, Character
+from utils.download_utils import download
 from utils.json_utils import get_game_json, get_table_global
 from utils.lang import Language, ENGLISH
 from utils.wiki_utils import bwiki, s, save_json_page
@@ -121,17 +122,12 @@ def get_quality_table() -> dict[int, str]:
     return get_quality_table.table
 
 
-def download_file(url: str, target: Path):
-    headers = None
-    if "miraheze" in url or "wikitide" in url:
-        headers = {'User-Agent': 'Bot by User:PetraMagna', }
-    with requests.get(url, stream=True, headers=headers) as r:
-        r.raise_for_status()
-        f = open(target, 'wb')
-        for chunk in r.iter_content(chunk_size=16 * 1024):
-            if chunk:  # filter out keep-alive new chunks
-                f.write(chunk)
-        f.close()
+def download_file(url: str, target: Path, sha1: str | None = None, use_cache: bool = False) -> str:
+    """
+    See utils.download_utils.download.
+    :return: SHA-1 of the downloaded file
+    """
+    return download(url, target, sha1=sha1, use_cache=use_cache)
 
 
 def get_cn_wiki_skins():
@@ -154,32 +150,42 @@ def make_tab_group(original: str) -> str:
     return original.replace(" ", "").replace("-", "")
 
 
+# (character id, subpage such as "/gallery", language code)
+CharPageKey = tuple[int, str, str]
+
+
+def get_char_page_title(char: Character, subpage_name: str = "", lang: Language = ENGLISH) -> str:
+    return f"{char.name}{subpage_name}{lang.page_suffix}"
+
+
+def fetch_char_pages(subpages: Iterable[str] = ("",), languages: Iterable[Language] = (ENGLISH,),
+                     workers: int = 4) -> dict[CharPageKey, Page]:
+    """
+    Preload the character pages of several subpages and languages at once. Titles are requested in
+    batches as large as the API allows, and batches are requested concurrently.
+    :return: (character id, subpage, language code) to the loaded page
+    """
+    pages: dict[CharPageKey, Page] = dict(((c.id, subpage, lang.code), Page(s, get_char_page_title(c, subpage, lang)))
+                                          for subpage in subpages
+                                          for lang in languages
+                                          for c in get_characters())
+    lst = list(pages.values())
+    batch_size = s.maxlimit
+    batches = [lst[i:i + batch_size] for i in range(0, len(lst), batch_size)]
+    # preloading fills in the Page objects that were passed in, so there is nothing to match up
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda batch: list(s.preloadpages(batch, groupsize=len(batch))), batches))
+    return pages
+
+
 def get_char_pages(subpage_name: str = "", lang: Language = ENGLISH) -> list[tuple[int, str, Page]]:
-    def get_page_name(char_name):
-        return f"{char_name}{subpage_name}{lang.page_suffix}"
-
-    characters = get_characters()
-    pages = list(PreloadingGenerator(Page(s, get_page_name(c.name)) for c in characters))
-    assert len(pages) == len(characters)
-    res = [(c.id, c.name, pages[index])
-           for index, c in enumerate(characters)
-           if get_page_name(c.name) == pages[index].title()]
-    assert len(res) == len(characters)
-    return res
+    pages = fetch_char_pages([subpage_name], [lang])
+    return [(c.id, c.name, pages[(c.id, subpage_name, lang.code)]) for c in get_characters()]
 
 
 def get_char_pages2(subpage_name: str = "", lang: Language = ENGLISH) -> list[tuple[Character, Page]]:
-    def get_page_name(char_name):
-        return f"{char_name}{subpage_name}{lang.page_suffix}"
-
-    characters = get_characters()
-    pages = list(PreloadingGenerator(Page(s, get_page_name(c.name)) for c in characters))
-    assert len(pages) == len(characters)
-    res = [(c, pages[index])
-           for index, c in enumerate(characters)
-           if get_page_name(c.name) == pages[index].title()]
-    assert len(res) == len(characters)
-    return res
+    pages = fetch_char_pages([subpage_name], [lang])
+    return [(c, pages[(c.id, subpage_name, lang.code)]) for c in get_characters()]
 
 
 def get_bwiki_char_pages() -> list[tuple[int, str, Page]]:
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from utils.dedup_utils import hash_files
+from utils.file_utils import cache_dir
+
+IMAGE_PIPELINE_VERSION = 1
+image_cache_dir = cache_dir / "images"
+
+# a transform takes a PIL image and keyword parameters and returns a new image
+ImageTransform = Callable[..., Any]
+ImageSteps = list[tuple[str, dict[str, Any]]]
+
+transforms: dict[str, ImageTransform] = {}
+
+
+def register_transform(name: str) -> Callable[[ImageTransform], ImageTransform]:
+    """
+    Register a transform under a name so that it can be used as a step in process_images.
+    Transform parameters are part of the cache key, so they must be JSON-serializable.
+    """
+    def decorator(f: ImageTransform) -> ImageTransform:
+        assert name not in transforms, f"Transform {name} is already registered"
+        transforms[name] = f
+        return f
+    return decorator
+
+
+@register_transform("colorize")
+def colorize(image, color: str):
+    """
+    Paint every pixel with one color and keep the alpha channel, like ImageMagick's
+    -fill color -colorize 100%.
+    :param color: color as #rrggbb
+    """
+    import numpy as np
+    from PIL import Image
+    pixels = np.array(image.convert("RGBA"))
+    pixels[..., :3] = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    return Image.fromarray(pixels, "RGBA")
+
+
+@register_transform("convert")
+def convert(image, mode: str = "RGBA"):
+    return image.convert(mode)
+
+
+def get_output_path(source_sha1: str, steps: ImageSteps, suffix: str) -> Path:
+    key = json.dumps([IMAGE_PIPELINE_VERSION, source_sha1, steps, suffix], sort_keys=True)
+    return image_cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}{suffix}"
+
+
+def apply_steps(source: Path, output: Path, steps: ImageSteps) -> None:
+    from PIL import Image
+    with Image.open(source) as image:
+        image.load()
+        for name, params in steps:
+            image = transforms[name](image, **params)
+    fd, temp_name = tempfile.mkstemp(dir=output.parent, suffix=output.suffix)
+    temp = Path(temp_name)
+    try:
+        with open(fd, "wb") as f:
+            image.save(f, format=Image.registered_extensions()[output.suffix])
+        temp.replace(output)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+def process_images(sources: list[Path], steps: ImageSteps, suffix: str = ".png",
+                   workers: int = 8) -> dict[Path, Path]:
+    """
+    Apply transforms to images in parallel. Results are written to a cache directory under a name
+    derived from the source's SHA-1 and the steps, so sources are never modified and unchanged
+    images are not processed again.
+    :param sources: source images
+    :param steps: names of registered transforms and their parameters, applied in order
+    :param suffix: file extension of the outputs, which determines their format
+    :param workers: number of images processed at the same time
+    :return: source to processed image
+    """
+    for name, _ in steps:
+        assert name in transforms, f"Unknown transform {name}"
+    image_cache_dir.mkdir(parents=True, exist_ok=True)
+    hashes = hash_files(sources)
+    outputs = dict((source, get_output_path(hashes[source], steps, suffix)) for source in sources)
+    pending = [source for source, output in outputs.items() if not output.exists()]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda source: apply_steps(source, outputs[source], steps), pending))
+    return outputs
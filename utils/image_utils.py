@@ -0,0 +1,62 @@
+import subprocess
+from pathlib import Path
+
+HASH_SIZE = 8
+# pHash is taken from the low frequencies of a DCT over a slightly larger thumbnail
+PHASH_SAMPLE_SIZE = 32
+
+
+def load_grayscale(path: Path, size: int):
+    """
+    Decode the first frame of an image with ImageMagick and scale it to size x size grayscale pixels.
+    :return: 2D float array with values in [0, 255]
+    """
+    import numpy as np
+    result = subprocess.run(["magick", f"{path}[0]", "-colorspace", "Gray", "-resize", f"{size}x{size}!",
+                             "-depth", "8", "gray:-"],
+                            check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(size, size).astype(np.float64)
+
+
+def bits_to_int(bits) -> int:
+    result = 0
+    for bit in bits:
+        result = (result << 1) | int(bit)
+    return result
+
+
+def average_hash(pixels) -> int:
+    """
+    aHash: which cells of an 8x8 thumbnail are brighter than the mean.
+    :param pixels: square grayscale image whose side is a multiple of HASH_SIZE
+    """
+    block = pixels.shape[0] // HASH_SIZE
+    small = pixels.reshape(HASH_SIZE, block, HASH_SIZE, block).mean(axis=(1, 3))
+    return bits_to_int((small > small.mean()).flatten())
+
+
+def perceptual_hash(pixels) -> int:
+    """
+    pHash: which of the lowest 8x8 DCT frequencies are above their median. Unlike aHash it is robust
+    to re-encoding, slight blurring and color adjustments.
+    :param pixels: PHASH_SAMPLE_SIZE x PHASH_SAMPLE_SIZE grayscale image
+    """
+    import numpy as np
+    n = pixels.shape[0]
+    k = np.arange(n)
+    dct_matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    low = (dct_matrix @ pixels @ dct_matrix.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # the DC coefficient is the overall brightness and would dominate the median
+    return bits_to_int(low > np.median(low[1:]))
+
+
+def hamming_distance(h1: int, h2: int) -> int:
+    return (h1 ^ h2).bit_count()
+
+
+def image_hashes(path: Path) -> tuple[int, int]:
+    """
+    :return: aHash and pHash of an image
+    """
+    pixels = load_grayscale(path, PHASH_SAMPLE_SIZE)
+    return average_hash(pixels), perceptual_hash(pixels)
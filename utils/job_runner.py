@@ -0,0 +1,136 @@
+import hashlib
+import json
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from utils.file_utils import atomic_write, cache_dir
+
+job_state_dir = cache_dir / "jobs"
+
+
+@dataclass
+class Task:
+    name: str
+    run: Callable[[], Any]
+    depends: list[str] = field(default_factory=list)
+    # exclusive tasks never run alongside other tasks, e.g. because they change the global language
+    exclusive: bool = False
+
+
+def output_hash(output: Any) -> str | None:
+    try:
+        return hashlib.sha1(pickle.dumps(output)).hexdigest()
+    except Exception:
+        return None
+
+
+class JobRunner:
+    """
+    Run named tasks in dependency order, independent tasks concurrently.
+
+    Completed tasks are recorded with the hash of their output in a state file. If a run fails,
+    the next run skips the tasks that already completed and starts at the ones that did not. A
+    completed task runs again if a task it depends on produced a different output since. The state
+    file is removed once every task has completed.
+    """
+
+    def __init__(self, name: str, tasks: list[Task], workers: int = 4):
+        self.name = name
+        self.tasks = dict((t.name, t) for t in tasks)
+        self.workers = workers
+        self.state_path: Path = job_state_dir / f"{name}.json"
+        for t in tasks:
+            for d in t.depends:
+                assert d in self.tasks, f"Task {t.name} depends on unknown task {d}"
+
+    def load_state(self) -> dict[str, dict]:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self, state: dict[str, dict]) -> None:
+        with atomic_write(self.state_path, encoding="utf-8") as f:
+            json.dump(state, f, indent=4)
+
+    def is_up_to_date(self, task: Task, state: dict[str, dict]) -> bool:
+        record = state.get(task.name)
+        if record is None:
+            return False
+        return all(d in state and record["inputs"].get(d) == state[d]["output"] for d in task.depends)
+
+    def run_task(self, task: Task) -> tuple[Any, float]:
+        print(f"[{self.name}] {task.name} started")
+        start = time.perf_counter()
+        output = task.run()
+        return output, time.perf_counter() - start
+
+    def run(self, resume: bool = True) -> None:
+        """
+        :param resume: skip tasks completed by an earlier failed run
+        """
+        state = self.load_state() if resume else {}
+        # a task is only up-to-date if everything it depends on is
+        done: set[str] = set()
+        changed = True
+        while changed:
+            changed = False
+            for t in self.tasks.values():
+                if t.name not in done and all(d in done for d in t.depends) and self.is_up_to_date(t, state):
+                    done.add(t.name)
+                    changed = True
+        for name in list(state.keys()):
+            if name not in done:
+                del state[name]
+        if len(done) > 0:
+            print(f"[{self.name}] Resuming, skipping {', '.join(done)}")
+
+        timings: dict[str, float] = {}
+        running: dict[Future, Task] = {}
+        failure: tuple[Task, BaseException] | None = None
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                if failure is None:
+                    running_names = set(r.name for r in running.values())
+                    ready = [t for t in self.tasks.values()
+                             if t.name not in done
+                             and t.name not in running_names
+                             and all(d in done for d in t.depends)]
+                    for t in ready:
+                        if any(r.exclusive for r in running.values()):
+                            break
+                        if t.exclusive and len(running) > 0:
+                            continue
+                        running[executor.submit(self.run_task, t)] = t
+                        if t.exclusive:
+                            break
+                if len(running) == 0:
+                    break
+                finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    t = running.pop(future)
+                    try:
+                        output, seconds = future.result()
+                    except Exception as e:
+                        print(f"[{self.name}] {t.name} failed: {e}")
+                        if failure is None:
+                            failure = (t, e)
+                        continue
+                    timings[t.name] = seconds
+                    done.add(t.name)
+                    state[t.name] = {"output": output_hash(output),
+                                     "inputs": dict((d, state[d]["output"]) for d in t.depends),
+                                     "seconds": seconds}
+                    self.save_state(state)
+                    print(f"[{self.name}] {t.name} finished in {seconds:.1f}s")
+
+        for name, seconds in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+            print(f"[{self.name}] {name:<40} {seconds:8.1f}s")
+        if failure is not None:
+            raise RuntimeError(f"{self.name}: task {failure[0].name} failed, rerun to resume") from failure[1]
+        assert len(done) == len(self.tasks), f"{self.name}: unreachable tasks {set(self.tasks) - done}"
+        self.state_path.unlink(missing_ok=True)
@@ -1,7 +1,10 @@
 import json
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Callable
 
 from utils.asset_utils import localization_root, csv_root, string_table_root, global_csv_root
+from utils.cache_utils import fingerprint, locked_cache
 from utils.lang import Language, LanguageVariants
 
 json_cache: dict[str, dict | None] = {}
@@ -21,8 +24,12 @@ def load_json(file: str | Path) -> dict | None:
     return json_cache[file_str]
 
 
+def get_game_json_path(language: Language) -> Path:
+    return localization_root / f"{language.game_json_dir}/Game.json"
+
+
 def get_game_json(language: Language = LanguageVariants.ENGLISH.value):
-    return load_json(localization_root / f"{language.game_json_dir}/Game.json")
+    return load_json(get_game_json_path(language))
 
 
 def get_game_json_cn():
@@ -73,3 +80,94 @@ def get_table_global(file_name: str) -> dict[int, dict]:
     table = dict((int(k), v) for k, v in json_data['Rows'].items())
     table_cache[table_entry] = table
     return table
+
+
+@dataclass
+class RegionDiff:
+    """
+    Differences between the GL and CN copies of a table, going from GL to CN (CN is usually ahead).
+    """
+    added: list[int]
+    removed: list[int]
+    changed: list[int]
+
+    def __bool__(self):
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.changed) > 0
+
+
+@dataclass
+class DualTable:
+    """
+    The CN and GL copies of a table. Rows that are identical in both regions are the same object.
+    """
+    name: str
+    cn: dict[int, dict]
+    gl: dict[int, dict]
+
+    def get(self, use_cn: bool) -> dict[int, dict]:
+        return self.cn if use_cn else self.gl
+
+    def is_shared(self, row_id: int) -> bool:
+        return self.cn.get(row_id, None) is self.gl.get(row_id, None)
+
+    def diff(self) -> RegionDiff:
+        added = [k for k in self.cn if k not in self.gl]
+        removed = [k for k in self.gl if k not in self.cn]
+        changed = [k for k in self.cn if k in self.gl and not self.is_shared(k)]
+        return RegionDiff(added, removed, changed)
+
+
+@locked_cache
+def get_dual_table(file_name: str) -> DualTable:
+    cn = get_table(file_name)
+    # Point identical GL rows at their CN counterpart, so that parsers can reuse work done for the
+    # other region. The dict returned by get_table_global is cached and left untouched.
+    gl: dict[int, dict] = {}
+    for k, row in get_table_global(file_name).items():
+        cn_row = cn.get(k, None)
+        gl[k] = cn_row if cn_row is not None and cn_row == row else row
+    return DualTable(file_name, cn, gl)
+
+
+def parse_dual_table[T](table: DualTable,
+                        parse_row: Callable[[int, dict], T | None]) -> tuple[dict[int, T], dict[int, T]]:
+    """
+    Parse both regions of a table. Rows shared by both regions are parsed only once and share the
+    resulting object.
+    :param table: the dual table
+    :param parse_row: turns a row id and a row into an object; return None to skip the row
+    :return: parsed CN rows and parsed GL rows, in table order
+    """
+    cn: dict[int, T] = {}
+    parsed_cn: set[int] = set()
+    for k, row in table.cn.items():
+        parsed_cn.add(k)
+        result = parse_row(k, row)
+        if result is not None:
+            cn[k] = result
+    gl: dict[int, T] = {}
+    for k, row in table.gl.items():
+        if k in parsed_cn and table.is_shared(k):
+            result = cn.get(k, None)
+        else:
+            result = parse_row(k, row)
+        if result is not None:
+            gl[k] = result
+    return cn, gl
+
+
+def table_fingerprint(tables: Iterable[str] = (), global_tables: Iterable[str] = (),
+                      localization: bool = True, version: int = 0) -> str:
+    """
+    Fingerprint of the game data a cached artifact was built from. The artifact should be rebuilt
+    whenever this changes.
+    :param tables: CN tables (see get_table)
+    :param global_tables: GL tables (see get_table_global)
+    :param localization: whether Game.json of every language is an input
+    :param version: bump this when the code building the artifact changes
+    """
+    paths = [csv_root / f"{t}.json" for t in tables]
+    paths.extend(global_csv_root / f"{t}.json" for t in global_tables)
+    if localization:
+        paths.extend(get_game_json_path(lang.value) for lang in LanguageVariants)
+    return fingerprint(paths, str(version))
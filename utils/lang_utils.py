@@ -3,9 +3,10 @@ from dataclasses import dataclass
 from typing import Callable
 
 from pywikibot import Page
-from pywikibot.pagegenerators import PreloadingGenerator
+from pywikibot.exceptions import PageCreatedConflictError
 
 from utils.lang import Language, LanguageVariants, ENGLISH, get_language, CHINESE
+from utils.page_cache import page_info_cache
 from utils.wiki_utils import s
 
 print(f"Current language: {get_language().code}")
@@ -46,12 +47,19 @@ class RedirectRequest:
 
 
 def redirect_pages(requests: list[RedirectRequest]):
-    existing_sources = dict((p.title(), p) for p in PreloadingGenerator(Page(s, r.source) for r in requests))
+    cache = page_info_cache(s)
+    cache.prefetch(r.source for r in requests)
+    missing = set(cache.confirm_missing(r.source for r in requests))
     for request in requests:
-        p = existing_sources[request.source]
-        if p.exists():
+        if request.source not in missing:
             continue
-        p.set_redirect_target(Page(s, f"{request.target}{request.lang.page_suffix}"), create=True, force=True)
+        p = Page(s, request.source)
+        try:
+            p.set_redirect_target(Page(s, f"{request.target}{request.lang.page_suffix}"), create=True, force=True,
+                                  createonly=True)
+        except PageCreatedConflictError:
+            print(f"{p.title()} was created by someone else in the meantime. Skipping.")
+        cache.invalidate(p)
 
 
 StringConverter = Callable[[str], str]
@@ -0,0 +1,124 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+from pywikibot import Page, Site
+from pywikibot.data.api import Request
+
+from utils.cache_utils import load_pickle_cache, save_pickle_cache
+
+PAGE_INFO_BATCH_SIZE = 500
+# pages rarely get deleted, but someone may create a missing page at any time
+PAGE_INFO_TTL = 24 * 3600
+MISSING_PAGE_TTL = 3600
+
+
+@dataclass
+class PageInfo:
+    exists: bool
+    redirect: bool
+    lastrevid: int | None
+    fetched_at: float
+
+    def is_fresh(self) -> bool:
+        ttl = PAGE_INFO_TTL if self.exists else MISSING_PAGE_TTL
+        return time.time() - self.fetched_at < ttl
+
+
+class PageInfoCache:
+    """
+    Existence, redirect status and latest revision of wiki pages, fetched in batches with
+    prop=info and persisted between runs. Entries expire after a TTL and are dropped whenever
+    this bot edits, uploads or moves the page.
+
+    A cached status is good enough to skip pages that exist, but may be outdated by up to a TTL. Pages
+    are checked with confirm_missing right before they are created.
+    """
+
+    def __init__(self, site: Site):
+        self.site = site
+        self.cache_name = f"page_info_{site.family.name}_{site.code}"
+        self.entries: dict[str, PageInfo] = load_pickle_cache(self.cache_name, "1") or {}
+        self._lock = threading.Lock()
+
+    def _key(self, page: Page | str) -> str:
+        if isinstance(page, str):
+            page = Page(self.site, page)
+        return page.title(with_ns=True)
+
+    def prefetch(self, pages: Iterable[Page | str], force: bool = False) -> None:
+        """
+        Fetch info of all pages that are not cached or whose entry expired.
+        :param force: also fetch pages whose entry is still fresh
+        """
+        with self._lock:
+            stale = list(dict.fromkeys(key
+                                       for key in map(self._key, pages)
+                                       if force or key not in self.entries or not self.entries[key].is_fresh()))
+        if len(stale) == 0:
+            return
+        batch_size = min(PAGE_INFO_BATCH_SIZE, self.site.maxlimit)
+        fetched: dict[str, PageInfo] = {}
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            data = Request(site=self.site, parameters={"action": "query", "prop": "info", "titles": batch}).submit()
+            now = time.time()
+            pages = data["query"]["pages"]
+            for page in (pages.values() if isinstance(pages, dict) else pages):
+                exists = "missing" not in page and "invalid" not in page
+                fetched[page["title"]] = PageInfo(exists, "redirect" in page, page.get("lastrevid"), now)
+        with self._lock:
+            self.entries.update(fetched)
+            self._save()
+
+    def get(self, page: Page | str) -> PageInfo:
+        key = self._key(page)
+        entry = self.entries.get(key)
+        if entry is None or not entry.is_fresh():
+            self.prefetch([key])
+            entry = self.entries.get(key)
+        if entry is None:
+            # the API normalized the title differently
+            entry = PageInfo(Page(self.site, key).exists(), False, None, time.time())
+        return entry
+
+    def exists(self, page: Page | str) -> bool:
+        return self.get(page).exists
+
+    def confirm_missing[P: (Page, str)](self, pages: Iterable[P]) -> list[P]:
+        """
+        The pages that the cache lists as missing and that are still missing on the wiki right now,
+        checked with one live query per batch. Use this right before creating pages.
+        """
+        missing = [p for p in pages if not self.exists(p)]
+        if len(missing) == 0:
+            return []
+        self.prefetch(missing, force=True)
+        return [p for p in missing if not self.exists(p)]
+
+    def invalidate(self, *pages: Page | str) -> None:
+        with self._lock:
+            for page in pages:
+                self.entries.pop(self._key(page), None)
+            self._save()
+
+    def _save(self) -> None:
+        save_pickle_cache(self.cache_name, "1", self.entries)
+
+
+_page_info_caches: dict[str, PageInfoCache] = {}
+_page_info_caches_lock = threading.Lock()
+
+
+def page_info_cache(site: Site | None = None) -> PageInfoCache:
+    """
+    The shared cache for a site (the default site if not given).
+    """
+    if site is None:
+        site = Site()
+    with _page_info_caches_lock:
+        key = str(site)
+        if key not in _page_info_caches:
+            _page_info_caches[key] = PageInfoCache(site)
+        return _page_info_caches[key]
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import wikitextparser as wtp
+from pywikibot import Page
+
+from global_config import Character
+from utils.lang import Language, set_language
+from utils.wiki_utils import save_pages
+
+# (character, parsed page, language, **context) -> data to hand back to the caller, if any
+TransformFunction = Callable[..., Any]
+# characters -> context passed to every call of the transform
+PrepareFunction = Callable[[list[Character]], dict[str, Any]]
+
+
+@dataclass
+class PageTransform:
+    """
+    A change to a character page that works on the parsed page in place. Transforms run in worker
+    processes, so they must be module-level functions. Work with side effects (such as uploads)
+    belongs in prepare, which runs once in the main process before any page is transformed.
+    """
+    name: str
+    transform: TransformFunction
+    prepare: PrepareFunction | None = None
+
+
+page_transforms: dict[str, PageTransform] = {}
+
+
+def register_page_transform(name: str, prepare: PrepareFunction | None = None) \
+        -> Callable[[TransformFunction], TransformFunction]:
+    def decorator(f: TransformFunction) -> TransformFunction:
+        page_transforms[name] = PageTransform(name, f, prepare)
+        return f
+    return decorator
+
+
+def apply_transforms(char: Character, text: str, lang: Language,
+                     transforms: list[tuple[str, TransformFunction, dict[str, Any]]]) -> tuple[str, dict[str, Any]]:
+    """
+    Parse a page once, apply all transforms to it and serialize it once.
+    :return: new page text and the data returned by each transform
+    """
+    set_language(lang)
+    parsed = wtp.parse(text)
+    results: dict[str, Any] = {}
+    for name, transform, context in transforms:
+        results[name] = transform(char, parsed, lang, **context)
+    return str(parsed), results
+
+
+def _apply_transforms_job(args) -> tuple[str, dict[str, Any]]:
+    return apply_transforms(*args)
+
+
+def run_page_transforms(pages: dict[Language, list[tuple[Character, Page]]], names: list[str],
+                        summary: str = "update page",
+                        workers: int | None = None) -> dict[tuple[str, str], dict[str, Any]]:
+    """
+    Apply registered transforms to character pages of several languages in parallel, then save all
+    changed pages in one batch.
+    :param pages: language to character pages
+    :param names: names of registered transforms, applied in this order
+    :param summary: edit summary
+    :param workers: number of worker processes; defaults to the number of CPUs
+    :return: (language code, character name) to the data returned by each transform
+    """
+    characters = list(dict((c.id, c) for lst in pages.values() for c, _ in lst).values())
+    transforms = []
+    for name in names:
+        t = page_transforms[name]
+        context = t.prepare(characters) if t.prepare is not None else {}
+        transforms.append((name, t.transform, context))
+    jobs = [(lang, char, p) for lang, lst in pages.items() for char, p in lst]
+    chunksize = max(1, len(jobs) // (workers or os.cpu_count() or 1))
+    # forking a process with other threads inside pywikibot or requests can leave their locks held in
+    # the children, so workers are spawned
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        outputs = list(executor.map(_apply_transforms_job,
+                                    ((char, p.text, lang, transforms) for lang, char, p in jobs),
+                                    chunksize=chunksize))
+    texts: dict[str, str] = {}
+    results: dict[tuple[str, str], dict[str, Any]] = {}
+    for (lang, char, p), (text, result) in zip(jobs, outputs):
+        results[(lang.code, char.name)] = result
+        if p.text.strip() != text.strip():
+            texts[p.title()] = text
+    save_pages(texts, summary=summary)
+    return results
+
+
+def transform_pages(pages: list[tuple[Character, Page]], name: str, lang: Language,
+                    save: bool = True, summary: str = "update page") -> dict[str, Any]:
+    """
+    Apply a single registered transform to pages in this process. The pages' text is updated
+    and the pages are saved if requested.
+    :return: character name to the data returned by the transform
+    """
+    t = page_transforms[name]
+    context = t.prepare([c for c, _ in pages]) if t.prepare is not None else {}
+    results: dict[str, Any] = {}
+    for char, p in pages:
+        parsed = wtp.parse(p.text)
+        results[char.name] = t.transform(char, parsed, lang, **context)
+        if p.text.strip() == str(parsed).strip():
+            continue
+        p.text = str(parsed)
+        if save:
+            p.save(summary=summary, minor=True)
+    return results
@@ -0,0 +1,179 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from utils.file_utils import atomic_write, cache_dir
+
+upload_progress_dir = cache_dir / "upload_progress"
+
+
+def backoff_delays(attempts: int = 8, base: float = 2, cap: float = 120) -> Iterator[float]:
+    """
+    Exponential backoff with full jitter: the n-th delay is uniformly random in [0, min(cap, base * 2^n)].
+    """
+    for attempt in range(attempts):
+        yield random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def with_backoff[T](action: Callable[[], T], retryable: Callable[[Exception], bool],
+                    delays: Iterable[float] | None = None, name: str = "Request") -> T:
+    """
+    Run action, and run it again after each delay for as long as it fails with a retryable exception.
+    :param retryable: whether an exception is worth another attempt
+    :param delays: waits between attempts; defaults to backoff_delays()
+    :param name: what is being attempted, for logging
+    :return: the result of the first successful attempt
+    """
+    delays = iter(backoff_delays() if delays is None else delays)
+    while True:
+        try:
+            return action()
+        except Exception as e:
+            if not retryable(e):
+                raise
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            print(f"{name} failed: {e}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+class RateBudget:
+    """
+    Limits on edits per minute and bytes per second shared by all upload workers. Each limit is a
+    token bucket that may go into debt, so a single large file is never blocked forever but the
+    average rate stays within budget. None means unlimited.
+
+    Note that pywikibot additionally enforces put_throttle from user-config.py between writes.
+    """
+
+    def __init__(self, edits_per_minute: float | None = None, bytes_per_second: float | None = None):
+        self.edits_per_second = None if edits_per_minute is None else edits_per_minute / 60
+        self.bytes_per_second = bytes_per_second
+        self._edit_tokens = 1.0
+        self._byte_tokens = float(bytes_per_second or 0)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.edits_per_second is not None:
+            self._edit_tokens = min(1.0, self._edit_tokens + elapsed * self.edits_per_second)
+        if self.bytes_per_second is not None:
+            self._byte_tokens = min(self.bytes_per_second, self._byte_tokens + elapsed * self.bytes_per_second)
+
+    def acquire(self, size: int = 0) -> None:
+        """
+        Block until one edit of the given size fits in the budget, then spend it.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0.0
+                if self.edits_per_second is not None and self._edit_tokens < 1:
+                    wait = max(wait, (1 - self._edit_tokens) / self.edits_per_second)
+                if self.bytes_per_second is not None and self._byte_tokens < 0:
+                    wait = max(wait, -self._byte_tokens / self.bytes_per_second)
+                if wait == 0:
+                    if self.edits_per_second is not None:
+                        self._edit_tokens -= 1
+                    if self.bytes_per_second is not None:
+                        self._byte_tokens -= size
+                    return
+            time.sleep(wait)
+
+
+class UploadProgress:
+    """
+    Keys of requests a named job has already finished, persisted to disk so an interrupted run
+    can resume where it stopped.
+    """
+
+    def __init__(self, job: str | None):
+        self.path: Path | None = None if job is None else upload_progress_dir / f"{job}.json"
+        self.done: set[str] = set()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.done = set(json.load(f))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark_done(self, key: str) -> None:
+        with self._lock:
+            self.done.add(key)
+            if self.path is None:
+                return
+            with atomic_write(self.path, encoding="utf-8") as f:
+                json.dump(sorted(self.done), f, ensure_ascii=False)
+
+    def clear(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+class UploadScheduler[T]:
+    """
+    Run uploads on a bounded pool of worker threads within a rate budget. Uploads spend most of
+    their time waiting on the network, so a few workers keep the wiki busy instead of idling on
+    latency.
+
+    The upload action is a parameter, which makes the scheduler easy to point at a fake wiki.
+    """
+
+    def __init__(self,
+                 upload: Callable[[T], None],
+                 key: Callable[[T], str],
+                 size: Callable[[T], int] = lambda _: 0,
+                 workers: int = 4,
+                 budget: RateBudget | None = None):
+        """
+        :param upload: performs a single upload; raising an exception marks it as failed
+        :param key: unique key of a request, used to record progress
+        :param size: number of bytes a request sends, used for the bytes/s budget
+        :param workers: number of concurrent uploads
+        :param budget: rate limits shared by all workers
+        """
+        self.upload = upload
+        self.key = key
+        self.size = size
+        self.workers = workers
+        self.budget = budget if budget is not None else RateBudget()
+
+    def _run_one(self, request: T) -> None:
+        self.budget.acquire(self.size(request))
+        self.upload(request)
+
+    def run(self, requests: list[T], job: str | None = None) -> list[tuple[T, Exception]]:
+        """
+        :param requests: uploads to perform
+        :param job: name under which progress is persisted; requests finished by an earlier run of
+            the same job are skipped. Progress is discarded once every request succeeds.
+        :return: failed requests and their exceptions
+        """
+        progress = UploadProgress(job)
+        pending = [r for r in requests if self.key(r) not in progress]
+        if len(pending) < len(requests):
+            print(f"Resuming {job}: {len(requests) - len(pending)} of {len(requests)} uploads already done")
+        failures: list[tuple[T, Exception]] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = dict((executor.submit(self._run_one, r), r) for r in pending)
+            for future in as_completed(futures):
+                request = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Upload of {self.key(request)} failed: {e}")
+                    failures.append((request, e))
+                    continue
+                progress.mark_done(self.key(request))
+        if len(failures) == 0:
+            progress.clear()
+        return failures
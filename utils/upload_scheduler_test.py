@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils import upload_scheduler
+from utils.upload_scheduler import RateBudget, UploadScheduler, with_backoff
+
+
+class FakeWiki:
+    """
+    A local stand-in for the action=upload endpoint of MediaWiki's api.php. Files listed in
+    rate_limited are answered with a ratelimited error that many times before they are accepted;
+    files listed in rejected are always refused.
+    """
+
+    def __init__(self, rate_limited: dict[str, int] | None = None, rejected: set[str] | None = None):
+        self.rate_limited = dict(rate_limited or {})
+        self.rejected = set(rejected or [])
+        self.attempts: dict[str, int] = {}
+        # file name, size and time of every accepted upload
+        self.uploads: list[tuple[str, int, float]] = []
+        self.lock = threading.Lock()
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                query = parse_qs(urlparse(self.path).query)
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                response = wiki.handle(query["action"][0], query["filename"][0], body)
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/w/api.php"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, action: str, filename: str, body: bytes) -> dict:
+        assert action == "upload"
+        with self.lock:
+            self.attempts[filename] = self.attempts.get(filename, 0) + 1
+            if filename in self.rejected:
+                return {"error": {"code": "verification-error", "info": "File extension does not match"}}
+            if self.rate_limited.get(filename, 0) > 0:
+                self.rate_limited[filename] -= 1
+                return {"error": {"code": "ratelimited", "info": "You've exceeded your rate limit"}}
+            self.uploads.append((filename, len(body), time.monotonic()))
+            return {"upload": {"result": "Success", "filename": filename}}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def upload_to(wiki: FakeWiki, filename: str, content: bytes) -> None:
+    request = urllib.request.Request(f"{wiki.url}?action=upload&format=json&filename={filename}",
+                                     data=content, method="POST")
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+    if "error" in result:
+        raise RuntimeError(f"{result['error']['code']}: {result['error']['info']}")
+
+
+def is_rate_limited(e: Exception) -> bool:
+    return "ratelimited" in str(e)
+
+
+@pytest.fixture
+def progress_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_scheduler, "upload_progress_dir", tmp_path)
+    return tmp_path
+
+
+def make_scheduler(wiki: FakeWiki, files: dict[str, bytes], retries: int = 3,
+                   budget: RateBudget | None = None) -> UploadScheduler[str]:
+    def upload(name: str):
+        with_backoff(lambda: upload_to(wiki, name, files[name]), is_rate_limited, [0.01] * retries, name=name)
+
+    return UploadScheduler(upload, key=lambda name: name, size=lambda name: len(files[name]),
+                           workers=4, budget=budget)
+
+
+def test_backoff(progress_dir):
+    wiki = FakeWiki(rate_limited={"A.png": 2, "B.png": 5})
+    files = {"A.png": b"a", "B.png": b"b", "C.png": b"c"}
+    try:
+        failures = make_scheduler(wiki, files, retries=3).run(list(files))
+    finally:
+        wiki.close()
+    assert wiki.attempts == {"A.png": 3, "B.png": 4, "C.png": 1}
+    assert [name for name, _ in failures] == ["B.png"]
+    assert "ratelimited" in str(failures[0][1])
+    assert sorted(name for name, _, _ in wiki.uploads) == ["A.png", "C.png"]
+
+
+def test_resume(progress_dir):
+    files = {"A.png": b"a", "B.png": b"b", "C.png": b"c"}
+    wiki = FakeWiki(rejected={"B.png"})
+    try:
+        failures = make_scheduler(wiki, files).run(list(files), job="test_resume")
+    finally:
+        wiki.close()
+    assert [name for name, _ in failures] == ["B.png"]
+    assert (progress_dir / "test_resume.json").exists()
+
+    wiki = FakeWiki()
+    try:
+        failures = make_scheduler(wiki, files).run(list(files), job="test_resume")
+    finally:
+        wiki.close()
+    assert failures == []
+    assert wiki.attempts == {"B.png": 1}
+    # progress is discarded once every upload succeeded
+    assert not (progress_dir / "test_resume.json").exists()
+
+
+def test_edit_budget(progress_dir):
+    files = dict((f"{i}.png", b"x") for i in range(4))
+    wiki = FakeWiki()
+    try:
+        failures = make_scheduler(wiki, files, budget=RateBudget(edits_per_minute=600)).run(list(files))
+    finally:
+        wiki.close()
+    assert failures == []
+    # one edit is available right away, the others come at 10 per second
+    times = sorted(t for _, _, t in wiki.uploads)
+    assert times[-1] - times[0] >= 0.25
+
+
+def test_byte_budget(progress_dir):
+    files = dict((f"{i}.png", b"x" * 500) for i in range(4))
+    wiki = FakeWiki()
+    try:
+        failures = make_scheduler(wiki, files, budget=RateBudget(bytes_per_second=1000)).run(list(files))
+    finally:
+        wiki.close()
+    assert failures == []
+    assert sum(size for _, size, _ in wiki.uploads) == 2000
+    # the first 1000 bytes are available right away and the bucket may go 500 bytes into debt
+    times = sorted(t for _, _, t in wiki.uploads)
+    assert times[-1] - times[0] >= 0.4
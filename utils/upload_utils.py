@@ -3,12 +3,19 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from pywikibot import FilePage
-from pywikibot.pagegenerators import PreloadingGenerator
 from pywikibot.site._upload import Uploader
 
-from utils.asset_utils import resource_root, global_resources_root
+from utils.asset_index import resolve_asset, resolve_item_icon
+from utils.asset_utils import global_resources_root
+from utils.dedup_utils import get_wiki_file_index, hash_files
+from utils.page_cache import page_info_cache
+from utils.upload_scheduler import RateBudget, UploadScheduler, backoff_delays, with_backoff
 from utils.wiki_utils import s
 
+# Shared by every upload of this process, so that concurrent upload jobs stay within one budget together.
+# pywikibot's put_throttle from user-config.py still applies on top of it.
+upload_budget = RateBudget(edits_per_minute=30, bytes_per_second=4 * 1024 * 1024)
+
 
 def upload_skill_demo():
     url = "https://klbq-web-cdn.strinova.com/www/video/CharactersSkillVideos/{}/{}/{}{}.mp4"
@@ -22,12 +29,15 @@ def upload_skill_demo():
         "BaiMo": "Bai Mo"
     }
     temp_path = Path("temp.mp4")
+    cache = page_info_cache(s)
+    cache.prefetch(f"File:{name_map.get(name, name)} Skill{number}.mp4"
+                   for names in factions.values() for name in names for number in range(1, 4))
     for faction, names in factions.items():
         for name in names:
             for number in range(1, 4):
                 target_name = name_map.get(name, name)
                 target_file = FilePage(s, f"File:{target_name} Skill{number}.mp4")
-                if target_file.exists():
+                if cache.exists(target_file):
                     continue
 
                 source = url.format(faction, name, name, number)
@@ -41,6 +51,7 @@ def upload_skill_demo():
                          comment="batch upload skill videos",
                          text="Video from official site\n\n[[Category:Skill demos]]",
                          ignore_warnings=True).upload()
+                cache.invalidate(target_file)
 
 
 def upload_item_icons(items: list[int | str], text: str = "[[Category:Item icons]]",
@@ -48,68 +59,74 @@ def upload_item_icons(items: list[int | str], text: str = "[[Category:Item icons
     lst: list[UploadRequest] = []
     fails: set[int | str] = set()
     for item in items:
-        # try upload the big version if it exists, otherwise use small version
-        for big in [True, False, 114514]:
-            if big == 114514:
-                local_path = f"Store/T_Dynamic_ItemStore_Big_{item}.png"
-            else:
-                folder = "ItemIcon" if not big else "BigIcon"
-                file_name = "Item" if not big else "BigItem"
-                local_path = f"Item/{folder}/T_Dynamic_{file_name}_{item}.png"
-            source = resource_root / local_path
-            if not source.exists():
-                source = global_resources_root / local_path
-            if source.exists():
-                break
-        if not source.exists():
-            print(f"{source} does not exist")
+        source = resolve_item_icon(item)
+        if source is None:
+            print(f"Icon of item {item} does not exist")
             fails.add(item)
             continue
         lst.append(UploadRequest(source,
                                  FilePage(s, f"File:Item Icon {item}.png"),
                                  text,
                                  summary))
-    process_uploads(lst)
+    process_uploads(lst, job="item_icons")
     return fails
 
 
+def is_retryable_upload_error(e: Exception) -> bool:
+    return "http-timed-out" in str(e) or "ratelimited" in str(e)
+
+
 def upload_file(text: str, target: FilePage, summary: str = "batch upload file",
                 file: str | Path = None, url: str = None, force: bool = False,
-                ignore_dup: bool = False, redirect_dup: bool = False, move_dup: bool = False):
-    while True:
-        try:
-            if url is not None:
-                Uploader(s, target, source_url=url, text=text, comment=summary, ignore_warnings=force).upload()
-            if file is not None:
-                Uploader(s, target, source_filename=str(file), text=text, comment=summary,
-                         ignore_warnings=force).upload()
+                ignore_dup: bool = False, redirect_dup: bool = False, move_dup: bool = False,
+                max_attempts: int = 8):
+    def upload():
+        if url is not None:
+            Uploader(s, target, source_url=url, text=text, comment=summary, ignore_warnings=force).upload()
+        if file is not None:
+            Uploader(s, target, source_filename=str(file), text=text, comment=summary,
+                     ignore_warnings=force).upload()
+
+    try:
+        with_backoff(upload, is_retryable_upload_error, backoff_delays(max_attempts - 1),
+                     name=f"Upload of {target.title(with_ns=True)}")
+    except Exception as e:
+        search = re.search(r"duplicate of \['([^']+)'", str(e))
+        if 'already exists' in str(e):
             return
-        except Exception as e:
-            search = re.search(r"duplicate of \['([^']+)'", str(e))
-            if 'already exists' in str(e):
-                return
-            if "http-timed-out" in str(e):
-                continue
-            if "was-deleted" in str(e):
-                # print(f"Warning: {target.title(with_ns=True)} was deleted. Reuploading...")
-                # force = True
-                # continue
-                print(f"INFO: {target.title(with_ns=True)} was deleted. Will not reupload.")
-                return
-            assert search is not None, str(e)
-            existing_page = f"File:{search.group(1)}"
-            if ignore_dup:
-                return
-            if redirect_dup:
-                target.set_redirect_target(existing_page, create=True, summary="redirect to existing file")
-                return
-            if move_dup:
-                FilePage(s, existing_page).move(
-                    target.title(with_ns=True, underscore=True),
-                    reason="rename file")
-                return
-            raise RuntimeError(f"{existing_page} already exists and so {target.title()} is a dup") from e
-
+        if is_retryable_upload_error(e):
+            raise
+        if "was-deleted" in str(e):
+            # print(f"Warning: {target.title(with_ns=True)} was deleted. Reuploading...")
+            # force = True
+            # continue
+            print(f"INFO: {target.title(with_ns=True)} was deleted. Will not reupload.")
+            return
+        assert search is not None, str(e)
+        resolve_duplicate(target, f"File:{search.group(1)}", ignore_dup, redirect_dup, move_dup, e)
+        return
+    page_info_cache(s).invalidate(target)
+
+
+def resolve_duplicate(target: FilePage, existing_page: str,
+                      ignore_dup: bool = False, redirect_dup: bool = False, move_dup: bool = False,
+                      cause: Exception | None = None):
+    """
+    Handle an upload to target whose content already exists on the wiki as existing_page.
+    """
+    if ignore_dup:
+        return
+    if redirect_dup:
+        target.set_redirect_target(existing_page, create=True, summary="redirect to existing file")
+        page_info_cache(s).invalidate(target)
+        return
+    if move_dup:
+        FilePage(s, existing_page).move(
+            target.title(with_ns=True, underscore=True),
+            reason="rename file")
+        page_info_cache(s).invalidate(target, existing_page)
+        return
+    raise RuntimeError(f"{existing_page} already exists and so {target.title()} is a dup") from cause
 
 
 def main():
@@ -121,17 +138,17 @@ if __name__ == '__main__':
 
 
 def upload_weapon(char_name: str, weapon_id: int) -> bool:
-    weapons_root = global_resources_root / "Weapon" / "InGameGrowth"
-    assert weapons_root.exists()
-    weapon_path = weapons_root / f"T_Dynamic_InGameGrowth_{weapon_id}.png"
+    assert (global_resources_root / "Weapon" / "InGameGrowth").exists()
+    weapon_path = resolve_asset("weapon_growth", weapon_id)
     p = FilePage(s, f"File:{char_name} GrowthWeapon.png")
-    if p.exists():
+    if page_info_cache(s).exists(p):
         return True
-    if not weapon_path.exists():
+    if weapon_path is None:
         print(f"File for weapon {weapon_id} of {char_name} does not exist")
         return False
     Uploader(s, p, source_filename=str(weapon_path),
              text="[[Category:Weapon growth images]]", comment="upload from game assets").upload()
+    page_info_cache(s).invalidate(p)
     return True
 
 
@@ -143,16 +160,73 @@ class UploadRequest:
     comment: str = "batch upload file"
 
 
-def process_uploads(requests: list[UploadRequest], force: bool = False, **kwargs) -> None:
+def request_size(r: UploadRequest) -> int:
+    return r.source.stat().st_size if isinstance(r.source, Path) and r.source.exists() else 0
+
+
+def find_duplicates(requests: list[UploadRequest]) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Find requests whose local file already exists on the wiki under another name, or that
+    have the same content as an earlier request, by comparing SHA-1 before anything is uploaded.
+    :return: file hashes of local sources by target title, and existing file title by target title
+    """
+    local = [r for r in requests if isinstance(r.source, Path) and r.source.exists()]
+    if len(local) == 0:
+        return {}, {}
+    hashes = hash_files(r.source for r in local)
+    index = get_wiki_file_index()
+    first_by_hash: dict[str, str] = {}
+    sha1s: dict[str, str] = {}
+    duplicates: dict[str, str] = {}
+    for r in local:
+        title = r.target.title(with_ns=True)
+        sha1 = hashes[r.source]
+        sha1s[title] = sha1
+        on_wiki = [t for t in index.find(sha1) if t != title]
+        if len(on_wiki) > 0:
+            # the index may be out of date for files re-uploaded or deleted since its last rebuild
+            on_wiki = [t for t in index.confirm(sha1) if t != title]
+        if len(on_wiki) > 0:
+            duplicates[title] = on_wiki[0]
+        elif sha1 in first_by_hash:
+            duplicates[title] = first_by_hash[sha1]
+        else:
+            first_by_hash[sha1] = title
+    return sha1s, duplicates
+
+
+def process_uploads(requests: list[UploadRequest], force: bool = False,
+                    workers: int = 4, budget: RateBudget | None = None, job: str | None = None,
+                    **kwargs) -> None:
+    """
+    Upload files that do not exist on the wiki yet.
+
+    Unless force is set, local files are first compared to the wiki's file hashes, so that
+    duplicates are ignored, redirected or moved (according to kwargs) without being uploaded.
+    :param requests: files to upload
+    :param force: ignore upload warnings
+    :param workers: number of concurrent uploads
+    :param budget: rate limits for this run; defaults to upload_budget
+    :param job: persist progress under this name so that an interrupted run can be resumed
+    :param kwargs: passed to upload_file
+    """
     for r in requests:
         if isinstance(r.target, str):
             if "File" not in r.target:
                 r.target = "File:" + r.target
             r.target = FilePage(s, r.target)
-    existing = set(p.title() for p in PreloadingGenerator((r.target for r in requests)) if p.exists())
-    for r in requests:
-        if r.target.title() in existing:
-            continue
+    cache = page_info_cache(s)
+    cache.prefetch(r.target for r in requests)
+    missing = [r for r in requests if not cache.exists(r.target)]
+    sha1s, duplicates = find_duplicates(missing) if not force else ({}, {})
+    batch_titles = set(r.target.title(with_ns=True) for r in missing)
+    dup_args = dict((k, v) for k, v in kwargs.items() if k in ("ignore_dup", "redirect_dup", "move_dup"))
+
+    def upload(r: UploadRequest):
+        title = r.target.title(with_ns=True)
+        if title in duplicates:
+            resolve_duplicate(r.target, duplicates[title], **dup_args)
+            return
         upload_args = [r.text, r.target, r.comment]
         if isinstance(r.source, str):
             upload_file(*upload_args, url=r.source, force=force, **kwargs)
@@ -161,3 +235,21 @@ def process_uploads(requests: list[UploadRequest], force: bool = False, **kwargs
         elif isinstance(r.source, Path):
             assert r.source.exists(), f"File {r.source} does not exist"
             upload_file(*upload_args, file=r.source, force=force, **kwargs)
+        if title in sha1s:
+            get_wiki_file_index().add(sha1s[title], title)
+
+    scheduler = UploadScheduler(upload, key=lambda r: r.target.title(), size=request_size,
+                                workers=workers, budget=budget if budget is not None else upload_budget)
+    # duplicates of files in the same batch can only be resolved once those are uploaded
+    later = [r for r in missing if duplicates.get(r.target.title(with_ns=True)) in batch_titles]
+    first = [r for r in missing if duplicates.get(r.target.title(with_ns=True)) not in batch_titles]
+    failures = scheduler.run(first, job=job)
+    failed_titles = set(r.target.title(with_ns=True) for r, _ in failures)
+    for r in later:
+        if duplicates[r.target.title(with_ns=True)] in failed_titles:
+            del duplicates[r.target.title(with_ns=True)]
+    failures += scheduler.run(later, job=job)
+    if len(sha1s) > 0:
+        get_wiki_file_index().save()
+    if len(failures) > 0:
+        raise RuntimeError(f"{len(failures)} of {len(missing)} uploads failed") from failures[0][1]
@@ -0,0 +1,53 @@
+from copy import deepcopy
+
+from utils.dict_utils import merge_dict, merge_dict2, merge_i18n
+
+
+def make_inputs() -> tuple[dict, dict]:
+    a = {"shared": {"name": "A", "nested": {"x": "1"}}, "only_a": {"k": "a"}, "text": "from a"}
+    b = {"shared": {"name": "B", "desc": "b"}, "only_b": {"k": "b"}, "text": "from b"}
+    return a, b
+
+
+def assert_unchanged_after_mutation(result: dict, a: dict, b: dict):
+    expected_a, expected_b = deepcopy(a), deepcopy(b)
+    result["text"] = "changed"
+    result["added"] = "new"
+    del result["only_b"]
+    # dicts on the merged paths are copies
+    result["shared"]["name"] = "changed"
+    result["shared"]["added"] = "new"
+    assert a == expected_a
+    assert b == expected_b
+
+
+def test_merge_dict_copy_on_write():
+    a, b = make_inputs()
+    result = merge_dict(a, b)
+    assert result == {"shared": {"name": "A", "desc": "b", "nested": {"x": "1"}},
+                      "only_a": {"k": "a"}, "only_b": {"k": "b"}, "text": "from a"}
+    # subtrees that only one input has are shared instead of copied
+    assert result["only_a"] is a["only_a"] and result["only_b"] is b["only_b"]
+    assert_unchanged_after_mutation(result, a, b)
+
+
+def test_merge_dict2_copy_on_write():
+    a, b = make_inputs()
+    result = merge_dict2(a, b)
+    assert result["shared"]["desc"] == "b"
+    assert result["only_a"] is a["only_a"] and result["only_b"] is b["only_b"]
+    assert_unchanged_after_mutation(result, a, b)
+
+
+def test_merge_i18n_copy_on_write():
+    a = {"en": {"1": "one", "2": "two"}, "ja": {"1": "ichi"}}
+    b = {"en": {"2": "deux", "3": "three"}, "cn": {"1": "yi"}}
+    c = {"en": {"4": "four"}}
+    expected = deepcopy((a, b, c))
+    result = merge_i18n(a, b, c)
+    assert result == merge_dict2(a, merge_dict2(b, c))
+    result["fr"] = {}
+    del result["en"]["1"]
+    for table in list(result.values()):
+        table["added"] = "new"
+    assert (a, b, c) == expected
@@ -2,11 +2,14 @@ import dataclasses
 import enum
 import json
 import re
-from typing import Any
+from typing import Any, Iterable
 
 from pywikibot import Site, Page
+from pywikibot.data.api import Request
+from pywikibot.pagegenerators import PreloadingGenerator
 
 from utils.dict_utils import MergeFunction, merge_dict2
+from utils.page_cache import page_info_cache
 
 
 def bwiki():
@@ -22,6 +25,58 @@ def save_page(page: Page | str, text, summary: str = "update page"):
     if page.text.strip() != text.strip():
         page.text = text
         page.save(summary=summary)
+        page_info_cache(page.site).invalidate(page)
+
+
+def save_pages(texts: dict[str, str], summary: str = "update page", dry_run: bool = False):
+    """
+    Save many pages in one go. Current revisions are fetched in batches and only pages whose text
+    actually changed are edited.
+    :param texts: page title to new page text
+    :param summary: edit summary
+    :param dry_run: only report pages that would change
+    """
+    texts = dict((Page(s, title).title(), text) for title, text in texts.items())
+    for page in PreloadingGenerator(Page(s, title) for title in texts):
+        text = texts[page.title()]
+        if page.text.strip() != text.strip():
+            if dry_run:
+                print(f"{page.title()} changed. No edit due to dry run.")
+                continue
+            page.text = text
+            page.save(summary=summary)
+            page_info_cache(page.site).invalidate(page)
+
+
+@dataclasses.dataclass
+class ImageInfo:
+    title: str
+    url: str
+    size: int
+    sha1: str
+
+
+def get_image_info(titles: Iterable[str], site: Site = s) -> dict[str, ImageInfo]:
+    """
+    URL, size and SHA-1 of many files, fetched with batched prop=imageinfo queries instead of one
+    request per file.
+    :param titles: file titles including the namespace
+    :return: title to image info; files that do not exist are left out
+    """
+    titles = list(dict.fromkeys(titles))
+    batch_size = min(500, site.maxlimit)
+    result: dict[str, ImageInfo] = {}
+    for start in range(0, len(titles), batch_size):
+        data = Request(site=site, parameters={"action": "query", "prop": "imageinfo",
+                                              "iiprop": "url|size|sha1",
+                                              "titles": titles[start:start + batch_size]}).submit()
+        pages = data["query"]["pages"]
+        for page in (pages.values() if isinstance(pages, dict) else pages):
+            if "imageinfo" not in page:
+                continue
+            info = page["imageinfo"][0]
+            result[page["title"]] = ImageInfo(page["title"], info["url"], info["size"], info["sha1"])
+    return result
 
 
 def dump_json(o):
@@ -110,6 +165,7 @@ def save_lua_table(page: Page | str, obj, summary: str = "update lua table"):
         return
     page.text = lua_string
     page.save(summary=summary)
+    page_info_cache(page.site).invalidate(page)
 
 
 def save_json_page(page: Page | str, obj, summary: str = "update json page", merge: bool | None | MergeFunction = False):
@@ -141,6 +197,7 @@ def save_json_page(page: Page | str, obj, summary: str = "update json page", mer
     if original != modified:
         page.text = modified
         page.save(summary=summary)
+        page_info_cache(page.site).invalidate(page)
 
 
 class EnhancedJSONEncoder(json.JSONEncoder):